@@ -2,7 +2,31 @@ import pytest
 
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.core.cache import caches
+from news.counters import recount_comments
 from news.models import Comment, News
+from news.throttle import reset_buckets
+
+COMMENTS_PER_NEWS = 200
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+    reset_buckets()
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    """Во всех тестах view падают при превышении бюджета запросов."""
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(settings):
+    """Лимиты на запись задают только тесты, которые их проверяют."""
+    settings.NEWS_THROTTLE_RATES = {}
 
 
 @pytest.fixture
@@ -74,6 +98,7 @@ def many_comments(new, author):
         for index in range(5)
     ]
     Comment.objects.bulk_create(all_comments)
+    recount_comments()
 
 
 @pytest.fixture
@@ -81,3 +106,20 @@ def form_data():
     return {
         'text': 'Новый текст',
     }
+
+
+@pytest.fixture(scope='function')
+def news_with_many_comments(many_news, author):
+    now = datetime.utcnow()
+    all_comments = [
+        Comment(
+            text=f'Текст комментария {index}',
+            created=now - timedelta(seconds=index),
+            news=news,
+            author=author,
+        )
+        for news in News.objects.all()
+        for index in range(COMMENTS_PER_NEWS)
+    ]
+    Comment.objects.bulk_create(all_comments, batch_size=1000)
+    recount_comments()
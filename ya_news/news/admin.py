@@ -1,15 +1,156 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
+from .forms import BAD_WORDS
 from .models import Comment, News
+from .moderation import delete_bad_comments
+from .search import fts_query
+
+# Сколько последних комментариев редактируется прямо на странице новости.
+INLINE_COMMENTS = 20
+ADMIN_PER_PAGE = 50
+# Меньшие таблицы считаются точно: COUNT по ним дешёвый.
+EXACT_COUNT_LIMIT = 10000
+MODERATED = 'Удалено комментариев с запрещёнными словами: {count}.'
+FTS_MATCH = 'SELECT rowid FROM news_news_fts WHERE news_news_fts MATCH %s'
+
+
+def estimated_count(queryset):
+    """
+    Число строк таблицы по статистике SQLite или None.
+
+    Оценка берётся из sqlite_stat1, которую заполняет ANALYZE (и
+    PRAGMA optimize), и годится только для выборки без условий.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    if query.where or query.distinct or connection.vendor != 'sqlite':
+        return None
+    # Наличие таблицы проверяется заранее: ошибку чтения пришлось бы
+    # ловить в транзакции, а она берёт блокировку на запись.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master "
+            "WHERE type = 'table' AND name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            # ANALYZE ещё не запускали.
+            return None
+        cursor.execute(
+            'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+            (queryset.model._meta.db_table,),
+        )
+        row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """На больших таблицах без фильтров не выполняет COUNT(*)."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
+
+
+class LatestCommentsFormSet(BaseInlineFormSet):
+    """
+    Только последние комментарии новости, а не все её комментарии.
+
+    При сохранении берутся комментарии, id которых пришли в скрытых
+    полях форм: пока страница была открыта, могли появиться новые, и
+    «последние 20» уже не совпадут с показанными.
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, '_latest'):
+            # Идёт по индексу (news, created, id) в обратном порядке.
+            queryset = super().get_queryset().order_by('-created', '-id')
+            if self.is_bound:
+                queryset = queryset.filter(pk__in=self.rendered_pks())
+            self._latest = queryset[:INLINE_COMMENTS]
+        return self._latest
+
+    def rendered_pks(self):
+        count = min(self.initial_form_count(), INLINE_COMMENTS)
+        pks = (self.data.get(f'{self.add_prefix(i)}-id') for i in range(count))
+        return [pk for pk in pks if pk and pk.isdigit()]
 
 
 class CommentInline(admin.StackedInline):
     model = Comment
+    formset = LatestCommentsFormSet
     extra = 0
+    # Список всех пользователей в каждой форме обходится дороже самих форм.
+    raw_id_fields = ('author',)
+
+
+class ModerationMixin:
+    paginator = EstimatedCountPaginator
+    list_per_page = ADMIN_PER_PAGE
+    show_full_result_count = False
+
+    def report_moderated(self, request, count):
+        self.message_user(
+            request, MODERATED.format(count=count), messages.SUCCESS
+        )
 
 
 @admin.register(News)
-class NewsAdmin(admin.ModelAdmin):
+class NewsAdmin(ModerationMixin, admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    list_display = ('title', 'date', 'comment_count')
+    readonly_fields = ('comment_count', 'all_comments')
+    search_fields = ('title', 'text')
+    date_hierarchy = 'date'
+    actions = ('moderate_comments',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """На SQLite ищет по индексу FTS5, а не через LIKE."""
+        if connections[queryset.db].vendor != 'sqlite':
+            return super().get_search_results(request, queryset, search_term)
+        query = fts_query(search_term)
+        if not query:
+            return queryset, False
+        return queryset.filter(pk__in=RawSQL(FTS_MATCH, (query,))), False
+
+    @admin.display(description='Все комментарии')
+    def all_comments(self, news):
+        url = reverse('admin:news_comment_changelist')
+        return format_html(
+            '<a href="{}?news__id__exact={}">{}</a>',
+            url, news.pk, news.comment_count,
+        )
+
+    @admin.action(description='Удалить комментарии с запрещёнными словами')
+    def moderate_comments(self, request, queryset):
+        count = delete_bad_comments(
+            Comment.objects.filter(news__in=queryset.values('pk')), BAD_WORDS
+        )
+        self.report_moderated(request, count)
+
+
+@admin.register(Comment)
+class CommentAdmin(ModerationMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'news', 'author', 'created')
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
+    # Свежие сверху: по первичному ключу таблица уже упорядочена.
+    ordering = ('-id',)
+    actions = ('moderate_comments',)
+
+    @admin.action(description='Удалить выбранные с запрещёнными словами')
+    def moderate_comments(self, request, queryset):
+        self.report_moderated(
+            request, delete_bad_comments(queryset, BAD_WORDS)
+        )
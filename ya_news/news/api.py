@@ -0,0 +1,181 @@
+"""
+JSON API для чтения новостей и комментариев.
+
+Списки листаются курсором по (date, id) и (created, id). Параметр
+fields= ограничивает и ответ, и столбцы в SELECT. Страницы списков
+отдаются потоком по STREAM_CHUNK_ROWS записей, так что большая
+страница не собирается в памяти одной строкой.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views import generic
+
+from .budget import QueryBudgetMixin
+from .conditional import ConditionalGetMixin
+from .models import Comment, News
+from .pagination import get_keyset_page
+from .replicas import ReplicaReadMixin
+
+# Имя в ответе и путь поля в ORM.
+NEWS_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'date': 'date',
+    'comment_count': 'comment_count',
+    'updated': 'updated',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+STREAM_CHUNK_ROWS = 100
+UNKNOWN_FIELDS = 'Неизвестные поля: {fields}.'
+INVALID_LIMIT = 'limit должен быть числом от 1 до {maximum}.'
+
+
+def to_json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def stream_page(rows, fields, next_cursor):
+    """Страница списка в JSON по частям."""
+    yield '{"results": ['
+    for start in range(0, len(rows), STREAM_CHUNK_ROWS):
+        chunk = ', '.join(
+            to_json({name: row[path] for name, path in fields.items()})
+            for row in rows[start:start + STREAM_CHUNK_ROWS]
+        )
+        yield f', {chunk}' if start else chunk
+    yield f'], "next": {to_json(next_cursor)}}}'
+
+
+class ApiMixin:
+    """Разбор fields= и limit= и ETag, зависящий от параметров запроса."""
+    fields = None
+
+    def get_fields(self):
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return self.fields
+        names = requested.split(',')
+        unknown = set(names) - set(self.fields)
+        if unknown:
+            raise BadRequest(
+                UNKNOWN_FIELDS.format(fields=', '.join(sorted(unknown)))
+            )
+        return {name: self.fields[name] for name in names}
+
+    def get_limit(self):
+        limit = self.request.GET.get('limit', '')
+        maximum = settings.NEWS_API_MAX_PAGE_SIZE
+        if not limit:
+            return settings.NEWS_API_PAGE_SIZE
+        if not limit.isdigit() or not 1 <= int(limit) <= maximum:
+            raise BadRequest(INVALID_LIMIT.format(maximum=maximum))
+        return int(limit)
+
+    def get_etag(self, version):
+        """Одни и те же данные в разной выборке полей — разные ответы."""
+        return hashlib.md5(
+            f'{version}:{self.request.get_full_path()}'.encode()
+        ).hexdigest()
+
+    def get_page(self, queryset, field, descending=False, extra=()):
+        """Страница словарей с запрошенными полями и полями курсора."""
+        self.page_fields = self.get_fields()
+        columns = {'id', field, *extra, *self.page_fields.values()}
+        return get_keyset_page(
+            queryset.values(*columns),
+            self.request.GET.get('cursor'),
+            self.get_limit(),
+            field,
+            descending,
+        )
+
+    def page_response(self, rows, next_cursor):
+        return StreamingHttpResponse(
+            stream_page(rows, self.page_fields, next_cursor),
+            content_type='application/json',
+        )
+
+
+class ApiView(
+        QueryBudgetMixin,
+        ReplicaReadMixin,
+        ConditionalGetMixin,
+        ApiMixin,
+        generic.View
+):
+    http_method_names = ('get', 'head', 'options')
+
+
+class NewsListApi(ApiView):
+    """Новости от свежих к старым, по индексу (-date, -id)."""
+    query_budget = 1
+    fields = NEWS_FIELDS
+
+    def get_validators(self):
+        # Страница нужна и для ETag, поэтому читается один раз, здесь.
+        self.rows, self.next_cursor = self.get_page(
+            News.objects.all(), 'date', descending=True, extra=('updated',)
+        )
+        if not self.rows:
+            return None, None
+        versions = [(row['id'], row['updated']) for row in self.rows]
+        # Без Last-Modified: удаление новости не увеличивает max(updated).
+        return self.get_etag(versions), None
+
+    def get(self, request, *args, **kwargs):
+        return self.page_response(self.rows, self.next_cursor)
+
+
+class NewsDetailApi(ApiView):
+    query_budget = 1
+    fields = NEWS_FIELDS
+
+    def get_validators(self):
+        fields = self.get_fields()
+        row = News.objects.filter(pk=self.kwargs['pk']).values(
+            'updated', *fields.values()
+        ).first()
+        if row is None:
+            raise Http404
+        self.data = {name: row[path] for name, path in fields.items()}
+        return self.get_etag(row['updated']), row['updated']
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(
+            self.data, json_dumps_params={'ensure_ascii': False}
+        )
+
+
+class CommentsApi(ApiView):
+    """
+    Комментарии новости по индексу (news, created, id).
+
+    Изменения комментариев меняют News.updated, поэтому валидатором
+    служит отметка времени новости, и при 304 комментарии не читаются.
+    """
+    query_budget = 2
+    fields = COMMENT_FIELDS
+
+    def get_validators(self):
+        updated = News.objects.filter(
+            pk=self.kwargs['pk']
+        ).values_list('updated', flat=True).first()
+        if updated is None:
+            raise Http404
+        return self.get_etag(updated), updated
+
+    def get(self, request, *args, **kwargs):
+        return self.page_response(*self.get_page(
+            Comment.objects.filter(news_id=self.kwargs['pk']), 'created'
+        ))
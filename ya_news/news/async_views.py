@@ -0,0 +1,36 @@
+"""
+Асинхронные версии страниц для чтения новостей под ASGI.
+
+Свежая страница из кеша анонимных читателей отдаётся прямо в цикле
+событий, без потока и без запросов к базе. Всё остальное выполняет
+обычная синхронная view за один переход в поток: если в Django есть
+асинхронный ORM, он понадобится только ей, а в Django 3.2 его нет.
+Поэтому медленные клиенты на закешированных страницах не занимают
+поток, пока ждут ответ.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import cached_response
+from .views import NewsDetailView, NewsList
+
+
+def async_view(sync_view):
+    """Асинхронная обёртка над синхронной view с кешем для анонимов."""
+
+    async def view(request, *args, **kwargs):
+        # Без cookie сессии пользователь анонимный, и его не нужно
+        # загружать из базы, чтобы выбрать кеш.
+        if (
+            request.method == 'GET'
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        ):
+            response = cached_response(request)
+            if response is not None:
+                return response
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+    return view
+
+
+news_list = async_view(NewsList.as_view())
+news_detail = async_view(NewsDetailView.as_view())
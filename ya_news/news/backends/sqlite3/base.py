@@ -0,0 +1,19 @@
+"""
+SQLite с транзакциями BEGIN IMMEDIATE.
+
+Транзакция по умолчанию (DEFERRED) берёт блокировку на запись только
+при первой записи. Если к этому моменту она уже читала, а запись
+начала другая транзакция, SQLite сразу отвечает "database is locked",
+не дожидаясь busy_timeout. Так устроены загрузка новостей (проверка
+дублей, затем вставка) и запись очереди комментариев, а триггеры
+полнотекстового индекса читают его служебные таблицы при каждой
+вставке новости. Блокировка в начале транзакции превращает такие
+отказы в обычное ожидание.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
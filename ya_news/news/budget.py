@@ -0,0 +1,69 @@
+"""
+Бюджет SQL-запросов на один HTTP-запрос к view.
+
+View с атрибутом query_budget считает все запросы к базе, включая
+сделанные при рендеринге шаблона, и при превышении бюджета пишет
+предупреждение в лог или, если QUERY_BUDGET_STRICT, падает.
+Управление транзакциями и точками сохранения в бюджет не входит.
+"""
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .profiling import render_response
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_PREFIXES = (
+    'BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT'
+)
+EXCEEDED = '{view}: {count} SQL-запросов при бюджете {budget}:\n{queries}'
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    """Обёртка для connection.execute_wrapper, запоминающая SQL."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(TRANSACTION_PREFIXES):
+            self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    query_budget = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.query_budget is None:
+            return super().dispatch(request, *args, **kwargs)
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            # Считаются запросы и к основной базе, и к репликам.
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = super().dispatch(request, *args, **kwargs)
+            # Шаблон рендерится лениво, а запросы из него тоже считаем.
+            if not getattr(response, 'is_rendered', True):
+                render_response(request, response)
+        if len(recorder.queries) > self.query_budget:
+            self.query_budget_exceeded(recorder.queries)
+        return response
+
+    def query_budget_exceeded(self, queries):
+        message = EXCEEDED.format(
+            view=type(self).__name__,
+            count=len(queries),
+            budget=self.query_budget,
+            queries='\n'.join(queries),
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
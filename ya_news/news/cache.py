@@ -0,0 +1,159 @@
+"""
+Кеш целых страниц новостей для анонимных читателей.
+
+Записи хранятся по адресу страницы вместе с общей версией данных.
+Любое изменение новостей или комментариев увеличивает версию, и
+запись считается устаревшей. Пересобирает её только тот процесс,
+который взял блокировку; остальные пока отдают прежнюю копию.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .profiling import render_response
+from .replicas import read_from_primary
+
+VERSION_KEY = 'news:version'
+# Заголовки, которые сохраняются вместе со страницей.
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache():
+    return caches[settings.NEWS_CACHE_ALIAS]
+
+
+def get_version():
+    cache = get_cache()
+    cache.add(VERSION_KEY, 1, timeout=None)
+    return cache.get(VERSION_KEY, 1)
+
+
+def incr(key, initial=0):
+    """Увеличивает бессрочный счётчик; пропавший считается равным initial."""
+    cache = get_cache()
+    cache.add(key, initial, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ успели вытеснить между add и incr.
+        cache.set(key, initial + 1, timeout=None)
+
+
+def _incr_version():
+    # get_version начинает с 1: вытесненная версия не должна вернуться к 1.
+    incr(VERSION_KEY, initial=1)
+
+
+def bump_version():
+    """
+    Помечает все закешированные страницы устаревшими.
+
+    Версия растёт сразу и ещё раз после коммита, чтобы не закрепилась
+    страница, отрендеренная по данным до завершения транзакции.
+    """
+    _incr_version()
+    transaction.on_commit(_incr_version)
+
+
+def _page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'news:page:{path}'
+
+
+def _from_entry(request, entry):
+    """Ответ из кеша; по сохранённым валидаторам может стать 304."""
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    for header, value in entry['headers'].items():
+        response[header] = value
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response,
+    )
+
+
+def _is_fresh(entry, version):
+    return (
+        entry is not None
+        and entry['version'] == version
+        and entry['expires'] > time.time()
+    )
+
+
+def cached_response(request):
+    """Свежая страница из кеша или None; база данных не используется."""
+    entry = get_cache().get(_page_key(request))
+    if _is_fresh(entry, get_version()):
+        return _from_entry(request, entry)
+    return None
+
+
+def cached_page(request, render):
+    """Отдаёт страницу из кеша или пересобирает её через render()."""
+    cache = get_cache()
+    key = _page_key(request)
+    version = get_version()
+    entry = cache.get(key)
+    if _is_fresh(entry, version):
+        return _from_entry(request, entry)
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, settings.NEWS_PAGE_CACHE_LOCK_TIMEOUT):
+        if entry is not None:
+            return _from_entry(request, entry)
+        return render()
+    try:
+        response = render()
+        if response.status_code == 200:
+            entry = {
+                'version': version,
+                'expires': time.time() + settings.NEWS_PAGE_CACHE_TIMEOUT,
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'headers': {
+                    header: response[header]
+                    for header in CACHED_HEADERS if response.has_header(header)
+                },
+            }
+            # Запись живёт дольше срока свежести, чтобы было что отдать,
+            # пока её пересобирает другой процесс.
+            timeout = (
+                settings.NEWS_PAGE_CACHE_TIMEOUT
+                + settings.NEWS_PAGE_CACHE_STALE_TIMEOUT
+            )
+            cache.set(key, entry, timeout)
+    finally:
+        cache.delete(lock_key)
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кеширует GET-запросы анонимных пользователей целиком.
+
+    Страница для кеша строится по основной базе: с отстающей реплики
+    под новой версией кеша сохранилась бы старая разметка, а анонимов
+    cookie после записи не закрепляет за основной базой.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        def render():
+            with read_from_primary():
+                response = super(AnonymousPageCacheMixin, self).dispatch(
+                    request, *args, **kwargs
+                )
+                if not getattr(response, 'is_rendered', True):
+                    render_response(request, response)
+            return response
+        return cached_page(request, render)
@@ -0,0 +1,140 @@
+"""
+Отложенная запись комментариев.
+
+В режиме NEWS_COMMENT_WRITE_BEHIND проверенные комментарии не
+сохраняются в запросе, а ставятся в очередь. Фоновый поток забирает
+их пачками не больше NEWS_COMMENT_BATCH_SIZE и не дольше
+NEWS_COMMENT_FLUSH_INTERVAL секунд и пишет каждую пачку одной
+транзакцией: так при наплыве комментариев блокировка SQLite на запись
+берётся один раз на пачку, а не на каждый комментарий. Пачка, которая
+не записалась, делится пополам, пока плохой комментарий не останется
+один: остальные не теряются.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Comment, News
+
+logger = logging.getLogger(__name__)
+
+
+def _write_batch(comments):
+    counts = Counter(comment.news_id for comment in comments)
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        # bulk_create не шлёт сигналы: счётчики и кеш обновляем сами.
+        now = timezone.now()
+        for news_id, count in counts.items():
+            News.objects.filter(pk=news_id).update(
+                updated=now, comment_count=F('comment_count') + count
+            )
+        bump_version()
+
+
+def write_comments(comments):
+    """
+    Сохраняет пачку комментариев и обновляет их новости.
+
+    Ошибка, например у комментария к удалённой за это время новости,
+    откатывает всю пачку; тогда половины пишутся отдельно. Точки
+    сохранения тут не помогли бы: SQLite проверяет внешние ключи только
+    при коммите. Возвращает число записавших транзакций.
+    """
+    try:
+        _write_batch(comments)
+        return 1
+    except DatabaseError:
+        if len(comments) == 1:
+            logger.exception(
+                'Не удалось записать комментарий к новости %s.',
+                comments[0].news_id,
+            )
+            return 0
+    middle = len(comments) // 2
+    return (
+        write_comments(comments[:middle]) + write_comments(comments[middle:])
+    )
+
+
+class CommentQueue:
+
+    def __init__(self, batch_size, interval):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+        # Сколько транзакций записал поток.
+        self.commits = 0
+
+    def put(self, comment):
+        self.start()
+        self.queue.put(comment)
+
+    def start(self):
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(
+                    target=self.run, name='comment-queue', daemon=True
+                )
+                self.worker.start()
+
+    def flush(self):
+        """Ждёт, пока все поставленные комментарии будут записаны."""
+        self.queue.join()
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            try:
+                self.commits += write_comments(batch)
+            except Exception:
+                logger.exception(
+                    'Не удалось записать %d комментариев.', len(batch)
+                )
+            finally:
+                if self.queue.empty():
+                    connection.close()
+                for _ in batch:
+                    self.queue.task_done()
+
+    def collect(self):
+        """Пачка из первого комментария и пришедших следом за ним."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_comment_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = CommentQueue(
+                settings.NEWS_COMMENT_BATCH_SIZE,
+                settings.NEWS_COMMENT_FLUSH_INTERVAL,
+            )
+            # Остаток очереди дописывается при штатном завершении.
+            atexit.register(_queue.flush)
+        return _queue
@@ -0,0 +1,47 @@
+"""Сверка денормализованного счётчика комментариев новостей."""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .cache import bump_version
+from .models import Comment, News
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def actual_comment_count():
+    """Подзапрос с настоящим числом комментариев новости."""
+    count = Comment.objects.filter(
+        news=OuterRef('pk')
+    ).order_by().values('news').annotate(count=Count('pk'))
+    return Coalesce(Subquery(count.values('count')), 0)
+
+
+def recount_comments(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Исправляет разошедшиеся comment_count и возвращает их число.
+
+    Новости проверяются пачками по id. Исправление пересчитывает
+    значение в самом UPDATE, так что комментарий, добавленный между
+    проверкой и исправлением, не теряется.
+    """
+    fixed = 0
+    last_id = 0
+    while True:
+        batch = list(
+            News.objects.filter(pk__gt=last_id).order_by('pk').annotate(
+                actual=actual_comment_count()
+            ).values_list('pk', 'comment_count', 'actual')[:batch_size]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        drifted = [pk for pk, stored, actual in batch if stored != actual]
+        if drifted:
+            with transaction.atomic():
+                fixed += News.objects.filter(pk__in=drifted).update(
+                    comment_count=actual_comment_count()
+                )
+    if fixed:
+        bump_version()
+    return fixed
@@ -0,0 +1,72 @@
+"""
+Кешированный блок комментариев новости.
+
+Список комментариев одинаков для всех читателей, поэтому рендерится
+один раз на версию новости: отметка News.updated меняется при любом
+изменении её комментариев. Вместо ссылок на редактирование в разметке
+остаются метки с автором комментария; ссылки подставляются для
+текущего пользователя уже после чтения из кеша.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from .cache import get_cache
+
+TEMPLATE_NAME = 'news/includes/comments.html'
+CONTROLS_MARKER = re.compile(r'<!--controls:(\d+):(\d+)-->')
+CONTROLS = (
+    '<a href="{}">Редактировать</a> |\n'
+    '        <a href="{}">Удалить</a>'
+)
+# Ссылки строятся один раз на ответ, id комментария подставляется
+# на место этого числа.
+PK_PLACEHOLDER = 10 ** 12
+
+
+def _fragment_key(news, cursor):
+    cursor = hashlib.md5((cursor or '').encode()).hexdigest()
+    return f'news:comments:{news.pk}:{news.updated.timestamp()}:{cursor}'
+
+
+def get_comments_block(news, cursor, load_page):
+    """
+    Возвращает разметку страницы комментариев и курсор следующей.
+
+    load_page() вызывается только при промахе кеша.
+    """
+    cache = get_cache()
+    key = _fragment_key(news, cursor)
+    block = cache.get(key)
+    if block is None:
+        comments, next_cursor = load_page()
+        html = render_to_string(TEMPLATE_NAME, {
+            'news': news,
+            'comments': comments,
+            'next_cursor': next_cursor,
+            'cursor': cursor,
+        })
+        block = (html, next_cursor)
+        cache.set(key, block, settings.NEWS_COMMENTS_CACHE_TIMEOUT)
+    return block
+
+
+def add_comment_controls(html, user):
+    """Подставляет ссылки редактирования в комментарии пользователя."""
+    author_id = str(user.pk)
+    parts = format_html(
+        CONTROLS,
+        reverse('news:edit', args=(PK_PLACEHOLDER,)),
+        reverse('news:delete', args=(PK_PLACEHOLDER,)),
+    ).split(str(PK_PLACEHOLDER))
+
+    def controls(match):
+        if match[1] != author_id:
+            return ''
+        return match[2].join(parts)
+    return mark_safe(CONTROLS_MARKER.sub(controls, html))
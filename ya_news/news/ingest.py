@@ -0,0 +1,80 @@
+"""Пакетная загрузка новостей из внешней ленты."""
+import logging
+import time
+from collections import namedtuple
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .cache import bump_version
+from .models import News, content_hash
+
+# Не больше лимита SQLite на число параметров в запросе.
+DEFAULT_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+IngestResult = namedtuple('IngestResult', ('created', 'skipped', 'elapsed'))
+
+
+def _build_news(story):
+    """Новость из строки ленты или None, если дата в ней неверна."""
+    news = News(title=story['title'], text=story['text'])
+    if story.get('date'):
+        try:
+            news.date = parse_date(story['date'])
+        except ValueError:
+            news.date = None
+        if news.date is None:
+            logger.warning(
+                'Пропущена новость %r: неверная дата %r.',
+                story['title'], story['date'],
+            )
+            return None
+    news.content_hash = content_hash(news.title, news.text)
+    return news
+
+
+def _ingest_batch(batch):
+    """Возвращает число созданных новостей."""
+    candidates = {}
+    for story in batch:
+        news = _build_news(story)
+        if news is not None:
+            candidates.setdefault(news.content_hash, news)
+    with transaction.atomic():
+        existing = set(News.objects.filter(
+            content_hash__in=candidates
+        ).values_list('content_hash', flat=True))
+        new_news = [
+            news for digest, news in candidates.items()
+            if digest not in existing
+        ]
+        # Параллельный запуск мог вставить те же новости: их пропускаем.
+        News.objects.bulk_create(new_news, ignore_conflicts=True)
+        if new_news:
+            # bulk_create не шлёт сигналы, кеш страниц сбрасываем сами.
+            bump_version()
+    return len(new_news)
+
+
+def ingest(stories, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Загружает поток словарей с ключами title, text и date.
+
+    Повторы внутри ленты и уже загруженные новости пропускаются,
+    поэтому повторный запуск на той же ленте ничего не меняет. Строки
+    с неверной датой тоже пропускаются и пишутся в лог.
+    """
+    started = time.monotonic()
+    stories = iter(stories)
+    created = skipped = 0
+    while True:
+        batch = list(islice(stories, batch_size))
+        if not batch:
+            break
+        batch_created = _ingest_batch(batch)
+        created += batch_created
+        skipped += len(batch) - batch_created
+    return IngestResult(created, skipped, time.monotonic() - started)
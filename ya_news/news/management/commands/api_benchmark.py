@@ -0,0 +1,85 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from news.cache import bump_version
+from news.models import News
+
+from .profile_report import PERCENTILES, percentile
+
+NO_NEWS = 'В базе нет новостей: сравнивать нечего.'
+
+
+def read(client, urls, cold):
+    """
+    Время и объём ответов на адреса одной страницы.
+
+    Тело потокового ответа читается целиком.
+    """
+    if cold:
+        # Без кеша страниц HTML рендерится при каждом запросе.
+        bump_version()
+    size = 0
+    started = time.perf_counter()
+    for url in urls:
+        response = client.get(url)
+        size += len(
+            b''.join(response) if response.streaming else response.content
+        )
+    return time.perf_counter() - started, size
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время ответа и объём HTML-страниц новостей '
+        'с ответами JSON API на тех же данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не сбрасывать кеш HTML-страниц перед запросами.',
+        )
+
+    def pairs(self):
+        news = News.objects.order_by('-comment_count').first()
+        if news is None:
+            raise CommandError(NO_NEWS)
+        home_size = settings.NEWS_COUNT_ON_HOME_PAGE
+        comments_size = settings.COMMENTS_COUNT_ON_PAGE
+        # Страница новости в API — это новость и первая страница
+        # комментариев.
+        return (
+            ('home', (reverse('news:home'),), (
+                f'{reverse("news:api_list")}?limit={home_size}',
+            )),
+            ('detail', (reverse('news:detail', args=(news.pk,)),), (
+                reverse('news:api_detail', args=(news.pk,)),
+                f'{reverse("news:api_comments", args=(news.pk,))}'
+                f'?limit={comments_size}',
+            )),
+        )
+
+    def handle(self, requests, warm, **options):
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        header = ('page', 'format', 'bytes') + tuple(
+            f'p{p}' for p in PERCENTILES
+        )
+        self.stdout.write('\t'.join(header))
+        for page, *formats in self.pairs():
+            for name, urls in zip(('html', 'json'), formats):
+                results = [
+                    read(client, urls, not warm) for _ in range(requests)
+                ]
+                timings = sorted(timing for timing, _ in results)
+                self.stdout.write('\t'.join(
+                    [page, name, str(results[-1][1])]
+                    + [
+                        f'{percentile(timings, p) * 1000:.2f}'
+                        for p in PERCENTILES
+                    ]
+                ))
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from news.comment_queue import CommentQueue
+from news.models import Comment, News
+
+TITLE = 'Проверка записи комментариев'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запись комментариев по одному и пачками из очереди '
+        'при параллельной отправке. Временная новость потом удаляется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--comments', type=int, default=400)
+
+    def handle(self, threads, comments, **options):
+        author, _ = get_user_model().objects.get_or_create(
+            username='comment-benchmark'
+        )
+        news = News.objects.create(title=TITLE, text=TITLE)
+        try:
+            self.stdout.write('mode\tcomments\tcommits\tcomments/s\tcommits/s')
+            for mode in ('sync', 'queue'):
+                self.report(mode, *self.run(
+                    mode, news, author, threads, comments
+                ))
+        finally:
+            news.delete()
+
+    def run(self, mode, news, author, threads, comments):
+        comment_queue = CommentQueue(
+            settings.NEWS_COMMENT_BATCH_SIZE,
+            settings.NEWS_COMMENT_FLUSH_INTERVAL,
+        )
+
+        def post(index):
+            comment = Comment(news=news, author=author, text=f'{index}')
+            try:
+                if mode == 'queue':
+                    comment_queue.put(comment)
+                else:
+                    with transaction.atomic():
+                        comment.save()
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(post, range(comments)))
+        comment_queue.flush()
+        elapsed = time.perf_counter() - started
+        commits = comment_queue.commits if mode == 'queue' else comments
+        return comments, commits, elapsed
+
+    def report(self, mode, comments, commits, elapsed):
+        self.stdout.write('\t'.join((
+            mode,
+            str(comments),
+            str(commits),
+            f'{comments / elapsed:.0f}',
+            f'{commits / elapsed:.0f}',
+        )))
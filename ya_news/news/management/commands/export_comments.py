@@ -0,0 +1,58 @@
+import time
+
+from django.core.exceptions import BadRequest
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import (
+    DEFAULT_CHUNK_SIZE, FORMATS, comment_rows, parse_day, render_lines
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает комментарии с автором, новостью и временем создания '
+        'в CSV или JSON Lines, не загружая их в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или "-" для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--since', help='С этого дня, ГГГГ-ММ-ДД.')
+        parser.add_argument('--until', help='По этот день включительно.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE
+        )
+
+    def handle(self, path, format=None, since=None, until=None,
+               chunk_size=DEFAULT_CHUNK_SIZE, **options):
+        file_format = format or ('csv' if path.endswith('.csv') else 'jsonl')
+        try:
+            since, until = parse_day(since), parse_day(until)
+        except BadRequest as error:
+            raise CommandError(error)
+        counter = CountingIterator(comment_rows(since, until, chunk_size))
+        lines = render_lines(file_format, counter)
+        started = time.monotonic()
+        if path == '-':
+            # OutputWrapper передаёт writelines своему потоку как есть.
+            self.stdout.writelines(lines)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                stream.writelines(lines)
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено комментариев: {counter.count}, {elapsed:.2f} с '
+            f'({counter.count / (elapsed or 1):.0f} строк/с).'
+        )
+
+
+class CountingIterator:
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.count += 1
+            yield item
@@ -0,0 +1,35 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from news.ingest import DEFAULT_BATCH_SIZE, ingest
+
+
+def read_stories(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = 'Загружает новости из ленты в формате JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или "-" для stdin.')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, path, batch_size=DEFAULT_BATCH_SIZE, **options):
+        if path == '-':
+            result = ingest(read_stories(sys.stdin), batch_size)
+        else:
+            with open(path, encoding='utf-8') as stream:
+                result = ingest(read_stories(stream), batch_size)
+        self.stdout.write(
+            f'Добавлено новостей: {result.created}, '
+            f'повторов пропущено: {result.skipped}, '
+            f'{result.elapsed:.2f} с '
+            f'({result.created / (result.elapsed or 1):.0f} новостей/с).'
+        )
@@ -0,0 +1,139 @@
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from .profile_report import PERCENTILES, percentile
+
+HOST = 'localhost'
+
+
+def wsgi_environ(path):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http',
+    }
+
+
+def asgi_scope(path):
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', HOST.encode())],
+        'server': (HOST, 80),
+    }
+
+
+def run_wsgi(path, requests, concurrency, threads, client_delay):
+    """
+    Клиенты ждут свободный поток сервера, а поток занят, пока медленный
+    клиент читает ответ.
+    """
+    application = get_wsgi_application()
+    workers = threading.Semaphore(threads)
+
+    def request(_):
+        started = time.perf_counter()
+        with workers:
+            body = application(
+                wsgi_environ(path), lambda status, headers: None
+            )
+            try:
+                for _ in body:
+                    pass
+                time.sleep(client_delay)
+            finally:
+                body.close()
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as clients:
+        return list(clients.map(request, range(requests)))
+
+
+def run_asgi(path, requests, concurrency, threads, client_delay):
+    """Все клиенты в одном цикле событий, медленная отправка ответа."""
+    application = get_asgi_application()
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.body' and not message.get(
+            'more_body'
+        ):
+            await asyncio.sleep(client_delay)
+
+    async def request(semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            await application(asgi_scope(path), receive, send)
+            return time.perf_counter() - started
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(request(semaphore) for _ in range(requests))
+        )
+    return asyncio.run(main())
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность и задержки WSGI и ASGI '
+        'на медленных клиентах. Асинхронные view используются для '
+        'адресов из NEWS_ASYNC_VIEWS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--concurrency', type=int, default=100,
+            help='Одновременных клиентов.',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=10,
+            help='Потоков WSGI-сервера.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Сколько секунд клиент читает ответ.',
+        )
+
+    def handle(self, path, requests, concurrency, threads, client_delay,
+               **options):
+        header = ('server', 'requests', 'rps') + tuple(
+            f'p{p}' for p in PERCENTILES
+        )
+        self.stdout.write('\t'.join(header))
+        for name, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+            started = time.perf_counter()
+            timings = sorted(
+                run(path, requests, concurrency, threads, client_delay)
+            )
+            elapsed = time.perf_counter() - started
+            self.stdout.write('\t'.join(
+                [name, str(requests), f'{requests / elapsed:.1f}']
+                + [
+                    f'{percentile(timings, p) * 1000:.2f}'
+                    for p in PERCENTILES
+                ]
+            ))
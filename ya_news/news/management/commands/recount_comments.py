@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from news.counters import DEFAULT_BATCH_SIZE, recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает разошедшиеся счётчики комментариев новостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+
+    def handle(self, batch_size=DEFAULT_BATCH_SIZE, **options):
+        fixed = recount_comments(batch_size)
+        self.stdout.write(f'Исправлено счётчиков: {fixed}.')
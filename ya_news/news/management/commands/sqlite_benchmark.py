@@ -0,0 +1,120 @@
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from news.sqlite import apply_pragmas
+
+from .profile_report import percentile
+
+PROFILES = (
+    # Название, прагмы и переиспользуется ли соединение.
+    ('default', {}, False),
+    ('performance', settings.SQLITE_PERFORMANCE_PRAGMAS, True),
+)
+ROWS = 1000
+READ = 'SELECT COUNT(*), MAX(value) FROM bench WHERE id > %s'
+WRITE = 'INSERT INTO bench (value) VALUES (%s)'
+
+
+class Workload:
+    """Читатели и писатели во временной базе, каждый в своём потоке."""
+
+    def __init__(self, path, pragmas, persistent):
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+
+    def connect(self):
+        wrapper = DatabaseWrapper({
+            **connection.settings_dict, 'NAME': str(self.path)
+        })
+        wrapper.ensure_connection()
+        apply_pragmas(wrapper, self.pragmas)
+        return wrapper
+
+    def setup(self):
+        wrapper = self.connect()
+        with wrapper.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE bench '
+                '(id INTEGER PRIMARY KEY AUTOINCREMENT, value INTEGER)'
+            )
+            cursor.executemany(WRITE, [(index,) for index in range(ROWS)])
+        wrapper.close()
+
+    def worker(self, sql, operations):
+        """Выполняет запросы и возвращает задержки и число ошибок."""
+        timings = []
+        errors = 0
+        wrapper = self.connect() if self.persistent else None
+        for index in range(operations):
+            started = time.perf_counter()
+            # Без постоянных соединений каждый запрос открывает своё,
+            # как view при CONN_MAX_AGE = 0.
+            current = wrapper or self.connect()
+            try:
+                with current.cursor() as cursor:
+                    cursor.execute(sql, (index % ROWS,))
+            except OperationalError:
+                errors += 1
+            finally:
+                if wrapper is None:
+                    current.close()
+            timings.append(time.perf_counter() - started)
+        if wrapper is not None:
+            wrapper.close()
+        return timings, errors
+
+    def run(self, readers, writers, operations):
+        self.setup()
+        jobs = [READ] * readers + [WRITE] * writers
+        started = time.perf_counter()
+        with ThreadPoolExecutor(len(jobs)) as executor:
+            results = list(executor.map(
+                lambda sql: self.worker(sql, operations), jobs
+            ))
+        return results, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Параллельные чтение и запись во временную базу SQLite с '
+        'настройками по умолчанию и с профилем производительности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--operations', type=int, default=500)
+
+    def handle(self, readers, writers, operations, **options):
+        self.stdout.write(
+            'profile\treads/s\twrites/s\tread p95\twrite p95\terrors'
+        )
+        for name, pragmas, persistent in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                workload = Workload(
+                    Path(directory) / 'bench.sqlite3', pragmas, persistent
+                )
+                results, elapsed = workload.run(readers, writers, operations)
+            self.report(name, results[:readers], results[readers:], elapsed)
+
+    def report(self, name, reads, writes, elapsed):
+        columns = [name]
+        timings = [
+            sorted(timing for worker, _ in results for timing in worker)
+            for results in (reads, writes)
+        ]
+        columns += [f'{len(values) / elapsed:.0f}' for values in timings]
+        columns += [
+            f'{percentile(values, 95) * 1000:.2f}' if values else '-'
+            for values in timings
+        ]
+        columns.append(str(sum(errors for _, errors in reads + writes)))
+        self.stdout.write('\t'.join(columns))
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.15 on 2026-10-18 18:05
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_content_hash(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    seen = set()
+    for news in News.objects.only('title', 'text').iterator():
+        digest = hashlib.sha256(
+            f'{news.title}\n{news.text}'.encode()
+        ).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        News.objects.filter(pk=news.pk).update(content_hash=digest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_comment_news_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='content_hash',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(fill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+# Внешнее содержимое: FTS5 хранит только индекс, текст берётся из
+# news_news. Индекс обновляют триггеры, так что его не обходят ни
+# bulk_create, ни прямые UPDATE.
+# Индексы префиксов: поиск ищет каждое слово как префикс, а без них
+# короткий префикс пришлось бы собирать из тысяч слов.
+# Эти объекты Django не отслеживает. Операции, после которых SQLite
+# пересоздаёт news_news (AddField, AlterField и т. п.), молча удалят
+# триггеры: в последующих миграциях таблицы нужен сырой ALTER TABLE,
+# как в notes 0006_note_sync, либо пересоздание триггеров следом.
+CREATE = (
+    """
+    CREATE VIRTUAL TABLE news_news_fts USING fts5(
+        title, text,
+        content='news_news', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER news_news_fts_insert AFTER INSERT ON news_news BEGIN
+        INSERT INTO news_news_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_delete AFTER DELETE ON news_news BEGIN
+        INSERT INTO news_news_fts (news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER news_news_fts_update AFTER UPDATE OF title, text
+    ON news_news BEGIN
+        INSERT INTO news_news_fts (news_news_fts, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO news_news_fts (rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO news_news_fts (news_news_fts) VALUES ('rebuild')",
+)
+DROP = (
+    'DROP TRIGGER news_news_fts_update',
+    'DROP TRIGGER news_news_fts_delete',
+    'DROP TRIGGER news_news_fts_insert',
+    'DROP TABLE news_news_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_comment_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE), run_on_sqlite(DROP)),
+    ]
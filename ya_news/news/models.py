@@ -1,37 +1,94 @@
+import hashlib
 from datetime import datetime
 
 from django.conf import settings
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from django.db import models
 
+DUPLICATE_NEWS = 'Новость с таким заголовком и текстом уже есть.'
+
+
+def content_hash(title, text):
+    """Отпечаток новости, по которому отсеиваются повторы из ленты."""
+    return hashlib.sha256(f'{title}\n{text}'.encode()).hexdigest()
+
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    content_hash = models.CharField(
+        max_length=64, unique=True, null=True, editable=False
+    )
+    # Меняется и при изменении комментариев к новости.
+    updated = models.DateTimeField(auto_now=True)
+    # Поддерживается сигналами комментариев, сверяется recount_comments.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def validate_unique(self, exclude=None):
+        """
+        content_hash не редактируется, и форма его не проверяет.
+
+        Повтор ловим здесь, чтобы админка показала ошибку, а не 500.
+        """
+        super().validate_unique(exclude)
+        if self.content_hash:
+            return
+        duplicates = News.objects.filter(
+            content_hash=content_hash(self.title, self.text)
+        ).exclude(pk=self.pk)
+        if duplicates.exists():
+            raise ValidationError({NON_FIELD_ERRORS: DUPLICATE_NEWS})
+
+    def save(self, *args, **kwargs):
+        """Отпечаток берётся от исходного текста и при правках не меняется."""
+        if not self.content_hash:
+            self.content_hash = content_hash(self.title, self.text)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
+    # Отдельные индексы по FK не нужны: их заменяют составные ниже.
     news = models.ForeignKey(
         News,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'id')
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_id_idx',
+            ),
+            models.Index(
+                fields=('author', 'created', 'id'),
+                name='comment_author_created_id_idx',
+            ),
+            # Выгрузка комментариев за период.
+            models.Index(
+                fields=('created', 'id'), name='comment_created_id_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,165 @@
+"""Поиск запрещённых слов в тексте комментариев."""
+import os
+import re
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.module_loading import import_string
+
+from .cache import bump_version
+from .models import Comment
+from .signals import touch_news
+
+MODERATION_BATCH_SIZE = 500
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = str.maketrans('aeopcxykmthb03', 'аеорсхукмтнвоз')
+
+
+def normalize(text):
+    return text.lower().translate(HOMOGLYPHS)
+
+
+class AhoCorasickMatcher:
+    """
+    Автомат Ахо — Корасик по списку слов.
+
+    Проверка текста занимает время, пропорциональное его длине,
+    независимо от размера списка.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [False]
+        for word in words:
+            self._add(word)
+        self._build_failure_links()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append(False)
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._terminal[state] = bool(word)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._terminal[child] |= self._terminal[self._fail[child]]
+                queue.append(child)
+
+    def search(self, text):
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._terminal[state]:
+                return True
+        return False
+
+
+class RegexMatcher:
+    """Одно скомпилированное регулярное выражение по списку слов."""
+
+    def __init__(self, words):
+        words = sorted(filter(None, words), key=len, reverse=True)
+        self._pattern = (
+            re.compile('|'.join(map(re.escape, words))) if words else None
+        )
+
+    def search(self, text):
+        return bool(self._pattern and self._pattern.search(text))
+
+
+# (ключ, список слов по умолчанию, матчер) одним кортежем.
+_matcher = None
+
+
+def _read_words(path):
+    with open(path, encoding='utf-8') as words_file:
+        return [line.strip() for line in words_file if line.strip()]
+
+
+def get_matcher(default_words):
+    """
+    Матчер, собранный из BAD_WORDS_FILE или из списка по умолчанию.
+
+    Пересобирается только при смене движка, списка или файла. Ключ и
+    матчер подменяются одним присваиванием, поэтому другой поток не
+    увидит новый ключ со старым матчером.
+    """
+    global _matcher
+    path = settings.BAD_WORDS_FILE
+    mtime = os.stat(path).st_mtime_ns if path else None
+    # Список сравнивается по id, а не поэлементно. Ссылка на него
+    # хранится рядом с матчером, так что id не достанется другому.
+    key = (settings.BAD_WORDS_MATCHER, path, mtime, id(default_words))
+    cached = _matcher
+    if cached is None or cached[0] != key:
+        words = _read_words(path) if path else default_words
+        engine = import_string(settings.BAD_WORDS_MATCHER)
+        cached = (
+            key, default_words, engine({normalize(word) for word in words})
+        )
+        _matcher = cached
+    return cached[2]
+
+
+def contains_bad_words(text, default_words):
+    return get_matcher(default_words).search(normalize(text))
+
+
+def delete_bad_comments(comments, default_words,
+                        batch_size=MODERATION_BATCH_SIZE):
+    """
+    Удаляет из выборки комментарии с запрещёнными словами.
+
+    Выборка читается пачками по id, без загрузки моделей целиком. На
+    пачку приходится один DELETE и по UPDATE счётчика на новость.
+    Возвращает число удалённых комментариев.
+    """
+    matcher = get_matcher(default_words)
+    comments = comments.order_by('pk').values_list('pk', 'news_id', 'text')
+    deleted = 0
+    last_id = 0
+    while True:
+        batch = list(comments.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        bad = [
+            (pk, news_id) for pk, news_id, text in batch
+            if matcher.search(normalize(text))
+        ]
+        if not bad:
+            continue
+        counts = Counter(news_id for _, news_id in bad)
+        with transaction.atomic():
+            # delete() отправил бы post_delete на каждый комментарий, и
+            # comment_deleted обновлял бы новость по одному разу на
+            # каждый. Вместо сигналов делаем то же, что их обработчики
+            # в signals.py, но по разу на новость и на пачку.
+            queryset = Comment.objects.filter(pk__in=[pk for pk, _ in bad])
+            deleted += queryset._raw_delete(queryset.db)
+            for news_id, count in counts.items():
+                touch_news(
+                    news_id,
+                    comment_count=Greatest(F('comment_count') - count, 0),
+                )
+            bump_version()
+    return deleted
@@ -0,0 +1,75 @@
+"""
+Keyset-пагинация по паре (поле, id).
+
+Комментарии листаются по (created, id), новости в API — по (date, id)
+от свежих к старым.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.exceptions import BadRequest
+from django.db.models import DateTimeField, Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+CURSOR_SEPARATOR = '-'
+INVALID_CURSOR = 'Некорректный курсор.'
+
+
+def encode_cursor(value, pk):
+    """Курсор указывает на последнюю показанную запись."""
+    if isinstance(value, datetime):
+        number = (value - EPOCH) // MICROSECOND
+    else:
+        number = value.toordinal()
+    return f'{number}{CURSOR_SEPARATOR}{pk}'
+
+
+def decode_cursor(cursor, field):
+    try:
+        number, pk = map(int, cursor.split(CURSOR_SEPARATOR))
+        if isinstance(field, DateTimeField):
+            return EPOCH + number * MICROSECOND, pk
+        return date.fromordinal(number), pk
+    except (ValueError, OverflowError):
+        raise BadRequest(INVALID_CURSOR)
+
+
+def _row_key(row, field):
+    if isinstance(row, dict):
+        return row[field], row['id']
+    return getattr(row, field), row.pk
+
+
+def get_keyset_page(queryset, cursor, size, field, descending=False):
+    """
+    Возвращает страницу после курсора и курсор следующей.
+
+    Записями могут быть модели или словари из values(); в словаре
+    должны быть field и id.
+    """
+    if cursor:
+        value, pk = decode_cursor(
+            cursor, queryset.model._meta.get_field(field)
+        )
+        after = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{after}': value})
+            | Q(**{field: value, f'pk__{after}': pk})
+        )
+    sign = '-' if descending else ''
+    rows = list(queryset.order_by(f'{sign}{field}', f'{sign}pk')[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(*_row_key(rows[-1], field))
+    return rows, next_cursor
+
+
+def get_comments_page(queryset, cursor, size):
+    """
+    Возвращает страницу комментариев после курсора и курсор следующей.
+
+    Выборка идёт по индексу (news, created, id) без OFFSET, поэтому
+    стоимость запроса не зависит от того, насколько далеко листают.
+    """
+    return get_keyset_page(queryset, cursor, size, 'created')
@@ -0,0 +1,171 @@
+"""
+Профилирование запросов: SQL, рендеринг шаблонов и остальной Python.
+
+Для выборки запросов с вероятностью PROFILING_SAMPLE_RATE middleware
+пишет строку JSON в лог и добавляет заголовок Server-Timing. При нулевой
+вероятности middleware отключается целиком.
+"""
+import asyncio
+import json
+import logging
+import random
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Профиль текущего запроса. Под ASGI view выполняется в другом потоке,
+# с другими соединениями, но с копией этого контекста.
+_profile = ContextVar('profile', default=None)
+
+
+class RequestProfile:
+
+    def __init__(self):
+        self.sql_time = 0.0
+        self.sql_count = 0
+        self.template_time = 0.0
+        self.template_sql_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += perf_counter() - started
+            self.sql_count += 1
+
+    def template_started(self):
+        started = perf_counter()
+        sql_before = self.sql_time
+
+        def finished(response):
+            self.template_time += perf_counter() - started
+            self.template_sql_time += self.sql_time - sql_before
+        return finished
+
+    def as_record(self, request, response, total):
+        # SQL из шаблона учитывается в sql_ms, а не в template_ms.
+        template = self.template_time - self.template_sql_time
+        match = request.resolver_match
+        return {
+            'url_name': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'sql_count': self.sql_count,
+            'template_ms': round(template * 1000, 2),
+            'python_ms': round(
+                max(total - self.sql_time - template, 0) * 1000, 2
+            ),
+        }
+
+
+def render_response(request, response):
+    """
+    Рендерит отложенный ответ шаблона, учитывая время в профиле.
+
+    View с бюджетом запросов рендерят ответ сами, ещё до middleware:
+    отсчёт из process_template_response начался бы уже после рендера.
+    """
+    profile = getattr(request, '_profile', None)
+    finished = profile and profile.template_started()
+    response.render()
+    if finished:
+        finished(response)
+
+
+def profile_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def install_profiler(connection):
+    if profile_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_query)
+
+
+@receiver(connection_created)
+def profile_new_connection(sender, connection, **kwargs):
+    if settings.PROFILING_SAMPLE_RATE:
+        install_profiler(connection)
+
+
+def server_timing(record):
+    return ', '.join((
+        f'sql;dur={record["sql_ms"]};desc="{record["sql_count"]} queries"',
+        f'tpl;dur={record["template_ms"]}',
+        f'py;dur={record["python_ms"]}',
+        f'total;dur={record["total_ms"]}',
+    ))
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует выборку запросов под WSGI и под ASGI.
+
+    Запросы считает обёртка profile_query, которая стоит на каждом
+    соединении, открытом при включённом профилировании, в том числе к
+    репликам. Синхронная middleware заставила бы Django выполнять всю
+    цепочку в одном потоке под ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django видит, что middleware можно ждать как корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        # Соединения потока могли открыться до включения профилирования.
+        for connection in connections.all():
+            install_profiler(connection)
+        profile, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+        profile, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _profile.reset(token)
+        return self.finish(request, response, profile, started)
+
+    def start(self, request):
+        profile = request._profile = RequestProfile()
+        return profile, _profile.set(profile), perf_counter()
+
+    def finish(self, request, response, profile, started):
+        record = profile.as_record(request, response, perf_counter() - started)
+        logger.info(json.dumps(record))
+        response['Server-Timing'] = server_timing(record)
+        return response
+
+    def process_template_response(self, request, response):
+        profile = getattr(request, '_profile', None)
+        if profile is not None and not response.is_rendered:
+            response.add_post_render_callback(profile.template_started())
+        return response
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from functools import partial
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news import admin as news_admin
+from news.admin import INLINE_COMMENTS, estimated_count
+from news.cache import get_version
+from news.counters import recount_comments
+from news.models import Comment, News
+from news.moderation import delete_bad_comments
+
+CHANGE_URL = 'admin:news_news_change'
+NEWS_CHANGELIST_URL = 'admin:news_news_changelist'
+COMMENT_CHANGELIST_URL = 'admin:news_comment_changelist'
+LARGE_STORY_COMMENTS = 5000
+
+
+def add_comments(news, author, count, text='Текст комментария {index}'):
+    now = datetime.utcnow()
+    Comment.objects.bulk_create((
+        Comment(
+            text=text.format(index=index),
+            created=now - timedelta(seconds=index),
+            news=news,
+            author=author,
+        )
+        for index in range(count)
+    ), batch_size=1000)
+    recount_comments()
+
+
+def page_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return [query['sql'] for query in context.captured_queries]
+
+
+def form_data(form):
+    return {
+        field.html_name: field.value()
+        for field in form if field.value() is not None
+    }
+
+
+def change_form_data(response):
+    """Данные, которые браузер отправит с открытой страницы правки."""
+    data = form_data(response.context['adminform'].form)
+    for inline in response.context['inline_admin_formsets']:
+        formset = inline.formset
+        data.update(form_data(formset.management_form))
+        for form in formset.forms:
+            data.update(form_data(form))
+    return data
+
+
+@pytest.fixture
+def large_story(new, author):
+    add_comments(new, author, LARGE_STORY_COMMENTS)
+    return new
+
+
+@pytest.mark.django_db
+def test_change_page_shows_latest_comments_only(admin_client, large_story):
+    response = admin_client.get(reverse(CHANGE_URL, args=(large_story.pk,)))
+    formset = response.context['inline_admin_formsets'][0].formset
+    assert formset.total_form_count() == INLINE_COMMENTS
+    latest = Comment.objects.filter(news=large_story).latest('created')
+    assert formset.forms[0].instance == latest
+    assert f'news__id__exact={large_story.pk}' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_change_page_queries_do_not_grow_with_comments(
+    admin_client, author, large_story
+):
+    small_story = News.objects.create(title='Тихая новость', text='Текст')
+    add_comments(small_story, author, INLINE_COMMENTS)
+    large = page_queries(
+        admin_client, reverse(CHANGE_URL, args=(large_story.pk,))
+    )
+    small = page_queries(
+        admin_client, reverse(CHANGE_URL, args=(small_story.pk,))
+    )
+    assert len(large) == len(small)
+
+
+@pytest.mark.django_db
+def test_change_page_saves_rendered_comments(admin_client, author, new):
+    add_comments(new, author, INLINE_COMMENTS)
+    url = reverse(CHANGE_URL, args=(new.pk,))
+    data = change_form_data(admin_client.get(url))
+    last = f'comment_set-{INLINE_COMMENTS - 1}'
+    data[f'{last}-text'] = 'Исправленный комментарий'
+    # Пока страница открыта, приходит ещё один комментарий, и последний
+    # из показанных уже не входит в свежие INLINE_COMMENTS.
+    fresh = Comment.objects.create(news=new, author=author, text='Свежий')
+    response = admin_client.post(url, data)
+    assert response.status_code == HTTPStatus.FOUND
+    edited = Comment.objects.get(pk=data[f'{last}-id'])
+    assert edited.text == 'Исправленный комментарий'
+    fresh.refresh_from_db()
+    assert fresh.text == 'Свежий'
+
+
+@pytest.mark.django_db
+def test_comment_changelist_filters_by_story(admin_client, large_story):
+    response = admin_client.get(
+        reverse(COMMENT_CHANGELIST_URL),
+        {'news__id__exact': large_story.pk},
+    )
+    assert response.context['cl'].result_count == LARGE_STORY_COMMENTS
+
+
+@pytest.mark.django_db
+def test_changelist_uses_estimated_count(admin_client, many_news, monkeypatch):
+    monkeypatch.setattr(news_admin, 'EXACT_COUNT_LIMIT', 0)
+    url = reverse(NEWS_CHANGELIST_URL)
+    assert estimated_count(News.objects.all()) is None
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    # Оценка расходится с реальным числом, и это видно по результату.
+    News.objects.create(title='Свежая новость', text='Текст')
+    assert estimated_count(News.objects.all()) == News.objects.count() - 1
+    response = admin_client.get(url)
+    assert response.context['cl'].result_count == News.objects.count() - 1
+    response = admin_client.get(url, {'q': 'Свежая'})
+    assert response.context['cl'].result_count == 1
+
+
+@pytest.mark.django_db
+def test_search_uses_fts_index(admin_client, many_news):
+    response = admin_client.get(
+        reverse(NEWS_CHANGELIST_URL), {'q': 'новост'}
+    )
+    assert response.context['cl'].result_count == News.objects.count()
+
+
+@pytest.mark.django_db
+def test_moderation_action_deletes_bad_comments_in_batches(
+    admin_client, author, large_story, monkeypatch,
+    django_assert_max_num_queries,
+):
+    add_comments(large_story, author, 700, text='Ты редиска {index}')
+    monkeypatch.setattr(
+        news_admin, 'delete_bad_comments',
+        partial(delete_bad_comments, batch_size=1000),
+    )
+    large_story.refresh_from_db()
+    updated = large_story.updated
+    version = get_version()
+    data = {
+        'action': 'moderate_comments',
+        '_selected_action': [large_story.pk],
+    }
+    # Пачки по 1000 из 5700 комментариев, а не запрос на каждый.
+    with django_assert_max_num_queries(40):
+        admin_client.post(reverse(NEWS_CHANGELIST_URL), data)
+    large_story.refresh_from_db()
+    assert large_story.comment_count == LARGE_STORY_COMMENTS
+    # Новость и кеш страниц обновлены, хотя сигналы не отправлялись.
+    assert large_story.updated > updated
+    assert get_version() != version
+    assert not Comment.objects.filter(text__startswith='Ты').exists()
+
+
+def transaction_statements(queryset):
+    with CaptureQueriesContext(connection) as context:
+        estimated_count(queryset)
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(('BEGIN', 'SAVEPOINT'))
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_estimated_count_reads_without_transaction(many_news):
+    # Транзакция на SQLite начинается с BEGIN IMMEDIATE и блокирует запись.
+    assert transaction_statements(News.objects.all()) == []
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    assert transaction_statements(News.objects.all()) == []
+    assert estimated_count(News.objects.all()) == News.objects.count()
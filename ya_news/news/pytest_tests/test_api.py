@@ -0,0 +1,140 @@
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import News
+
+LIST_URL = 'news:api_list'
+DETAIL_URL = 'news:api_detail'
+COMMENTS_URL = 'news:api_comments'
+
+
+def read_json(response):
+    assert response['Content-Type'] == 'application/json'
+    if response.streaming:
+        return json.loads(b''.join(response))
+    return response.json()
+
+
+def read_all(client, url, **params):
+    """Все записи списка, пройденного по курсорам."""
+    results = []
+    cursor = None
+    while True:
+        page = read_json(client.get(url, {
+            **params, **({'cursor': cursor} if cursor else {})
+        }))
+        results += page['results']
+        cursor = page['next']
+        if cursor is None:
+            return results
+
+
+@pytest.mark.django_db
+def test_news_list_cursor_pagination(client, many_news):
+    results = read_all(client, reverse(LIST_URL), limit=4)
+    expected = list(News.objects.values_list('id', flat=True))
+    assert [news['id'] for news in results] == expected
+
+
+@pytest.mark.django_db
+def test_comments_cursor_pagination(client, new, many_comments):
+    results = read_all(
+        client, reverse(COMMENTS_URL, args=(new.pk,)), limit=2
+    )
+    expected = list(new.comment_set.values_list('text', flat=True))
+    assert [comment['text'] for comment in results] == expected
+    assert {comment['author'] for comment in results} == {'Автор'}
+
+
+@pytest.mark.django_db
+def test_fields_limit_selected_columns(client, many_news):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse(LIST_URL), {'fields': 'title'})
+        page = read_json(response)
+    assert set(page['results'][0]) == {'title'}
+    select = queries.captured_queries[-1]['sql']
+    assert '"title"' in select
+    assert '"text"' not in select
+
+
+@pytest.mark.django_db
+def test_detail_fields(client, new):
+    url = reverse(DETAIL_URL, args=(new.pk,))
+    assert read_json(client.get(url, {'fields': 'id,title'})) == {
+        'id': new.pk, 'title': new.title,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', (
+    {'fields': 'title,password'},
+    {'limit': '0'},
+    {'limit': '100000'},
+    {'cursor': 'not-a-cursor'},
+))
+def test_invalid_parameters(client, new, params):
+    response = client.get(reverse(LIST_URL), params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_missing_news(client):
+    for name in (DETAIL_URL, COMMENTS_URL):
+        response = client.get(reverse(name, args=(0,)))
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_list_is_streamed(client, many_news):
+    assert client.get(reverse(LIST_URL)).streaming
+
+
+@pytest.mark.django_db
+def test_comments_etag(
+    client, author_client, new, many_comments, form_data,
+    django_assert_num_queries
+):
+    url = reverse(COMMENTS_URL, args=(new.pk,))
+    etag = client.get(url)['ETag']
+    assert client.get(url, {'limit': 1})['ETag'] != etag
+    # Для 304 достаточно отметки времени новости.
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    author_client.post(reverse('news:detail', args=(new.pk,)), form_data)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_list_etag_changes_with_news(client, many_news):
+    url = reverse(LIST_URL)
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    news = News.objects.first()
+    news.title = 'Исправленный заголовок'
+    news.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_api_benchmark_against_html(news_with_many_comments):
+    out = StringIO()
+    call_command('api_benchmark', requests=3, stdout=out)
+    rows = [line.split('\t') for line in out.getvalue().splitlines()[1:]]
+    sizes = {(page, name): int(size) for page, name, size, *_ in rows}
+    assert set(sizes) == {
+        ('home', 'html'), ('home', 'json'),
+        ('detail', 'html'), ('detail', 'json'),
+    }
+    assert sizes['home', 'json'] < sizes['home', 'html']
+    assert sizes['detail', 'json'] < sizes['detail', 'html']
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.urls import path
+
+from news import async_views
+from news.management.commands.load_test import asgi_scope
+
+CONCURRENT_REQUESTS = 5
+WAIT_TIMEOUT = 2
+
+
+class Rendezvous:
+    """View ждёт, пока до неё не дойдут все одновременные запросы."""
+
+    def reset(self):
+        self.arrived = 0
+        self.event = asyncio.Event()
+
+    async def view(self, request):
+        self.arrived += 1
+        if self.arrived == CONCURRENT_REQUESTS:
+            self.event.set()
+        try:
+            await asyncio.wait_for(self.event.wait(), WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            return HttpResponse('alone')
+        return HttpResponse('together')
+
+
+rendezvous = Rendezvous()
+urlpatterns = [path('wait/', rendezvous.view)]
+
+
+def call(view, request, **kwargs):
+    return async_to_sync(view)(request, **kwargs)
+
+
+def no_thread(*args, **kwargs):
+    raise AssertionError('Переход в поток не ожидался.')
+
+
+@pytest.mark.django_db
+def test_async_views_are_coroutines():
+    for view in (async_views.news_list, async_views.news_detail):
+        assert asyncio.iscoroutinefunction(view)
+
+
+@pytest.mark.django_db
+def test_cached_page_served_without_thread(
+    rf, new, monkeypatch, django_assert_num_queries
+):
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    first = call(async_views.news_detail, request, pk=new.pk)
+    monkeypatch.setattr(async_views, 'sync_to_async', no_thread)
+    with django_assert_num_queries(0):
+        second = call(async_views.news_detail, rf.get('/'), pk=new.pk)
+    assert second.content == first.content
+
+
+@pytest.mark.django_db
+def test_session_cookie_falls_back_to_sync_view(rf, author, new):
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    call(async_views.news_detail, request, pk=new.pk)
+    request = rf.get('/')
+    request.COOKIES[settings.SESSION_COOKIE_NAME] = 'session'
+    request.user = author
+    response = call(async_views.news_detail, request, pk=new.pk)
+    assert 'form' in response.context_data
+
+
+async def asgi_get(application, url):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+    await application(asgi_scope(url), receive, send)
+    return b''.join(message.get('body', b'') for message in messages)
+
+
+def test_asgi_requests_are_not_serialized(settings):
+    """
+    Цепочка middleware остаётся асинхронной: синхронная middleware
+    заставила бы Django выполнять запросы по одному в потоке.
+    """
+    settings.ROOT_URLCONF = __name__
+    settings.PROFILING_SAMPLE_RATE = 1
+
+    async def run():
+        rendezvous.reset()
+        application = get_asgi_application()
+        return await asyncio.gather(*(
+            asgi_get(application, '/wait/')
+            for _ in range(CONCURRENT_REQUESTS)
+        ))
+    assert asyncio.run(run()) == [b'together'] * CONCURRENT_REQUESTS
+
+
+@pytest.mark.django_db(transaction=True)
+def test_load_test_command(capsys):
+    call_command(
+        'load_test', requests=4, concurrency=2, threads=1, client_delay=0
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split('\t')[0] for line in lines] == [
+        'server', 'wsgi', 'asgi'
+    ]
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news.budget import QueryBudgetExceeded
+from news.models import Comment, News
+from news.views import NewsList
+
+HOME_URL = 'news:home'
+DETAIL_URL = 'news:detail'
+COMMENTS_URL = 'news:comments'
+EDIT_URL = 'news:edit'
+DELETE_URL = 'news:delete'
+BUDGET_WARNING = 'SQL-запросов при бюджете'
+
+
+@pytest.fixture
+def busy_comment(news_with_many_comments):
+    return Comment.objects.filter(news=News.objects.first()).last()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('strict', (True, False))
+@pytest.mark.parametrize('parametrized_client', (
+    pytest.lazy_fixture('client'), pytest.lazy_fixture('author_client'),
+))
+def test_read_views_within_budget(
+        settings, caplog, parametrized_client, busy_comment, strict
+):
+    # В строгом режиме превышение упадёт, в обычном — попадёт в лог.
+    settings.QUERY_BUDGET_STRICT = strict
+    news_id = busy_comment.news_id
+    for url in (
+        reverse(HOME_URL),
+        reverse(DETAIL_URL, args=(news_id,)),
+        reverse(COMMENTS_URL, args=(news_id,)),
+    ):
+        assert parametrized_client.get(url).status_code == HTTPStatus.OK
+    assert BUDGET_WARNING not in caplog.text
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('strict', (True, False))
+def test_write_views_within_budget(
+        settings, caplog, author_client, busy_comment, form_data, strict
+):
+    settings.QUERY_BUDGET_STRICT = strict
+    edit_url = reverse(EDIT_URL, args=(busy_comment.id,))
+    delete_url = reverse(DELETE_URL, args=(busy_comment.id,))
+    responses = (
+        author_client.get(edit_url),
+        author_client.post(edit_url, form_data),
+        author_client.post(
+            reverse(DETAIL_URL, args=(busy_comment.news_id,)), form_data
+        ),
+        author_client.get(delete_url),
+        author_client.post(delete_url),
+    )
+    assert [response.status_code for response in responses] == [
+        HTTPStatus.OK, HTTPStatus.FOUND, HTTPStatus.FOUND,
+        HTTPStatus.OK, HTTPStatus.FOUND,
+    ]
+    assert BUDGET_WARNING not in caplog.text
+
+
+@pytest.mark.django_db
+def test_exceeded_budget_raises_in_strict_mode(client, monkeypatch):
+    monkeypatch.setattr(NewsList, 'query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded, match='FROM "news_news"'):
+        client.get(reverse(HOME_URL))
+
+
+@pytest.mark.django_db
+def test_exceeded_budget_is_logged(client, settings, monkeypatch, caplog):
+    settings.QUERY_BUDGET_STRICT = False
+    monkeypatch.setattr(NewsList, 'query_budget', 0)
+    response = client.get(reverse(HOME_URL))
+    assert response.status_code == 200
+    # Список и запрос за валидаторами ETag: ради ответов 304 без
+    # рендеринга страница платит одним запросом.
+    assert f'NewsList: 2 {BUDGET_WARNING} 0' in caplog.text
@@ -0,0 +1,66 @@
+import pytest
+from django.urls import reverse
+
+from news.cache import _page_key, get_cache
+from news.ingest import ingest
+from news.models import Comment
+
+HOME_URL = 'news:home'
+DETAIL_URL = 'news:detail'
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(
+    client, pk_for_args_new, django_assert_num_queries
+):
+    for url in (reverse(HOME_URL), reverse(DETAIL_URL, args=pk_for_args_new)):
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content
+
+
+@pytest.mark.django_db
+def test_comment_invalidates_cached_pages(
+    client, author_client, pk_for_args_new, form_data
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    client.get(url)
+    client.get(reverse(HOME_URL))
+    author_client.post(url, data=form_data)
+    assert form_data['text'] in client.get(url).content.decode()
+    assert 'Комментариев: 1' in client.get(reverse(HOME_URL)).content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_delete_and_ingest_invalidate(client, comment):
+    url = reverse(DETAIL_URL, args=(comment.news_id,))
+    client.get(url)
+    Comment.objects.all().delete()
+    assert comment.text not in client.get(url).content.decode()
+    client.get(reverse(HOME_URL))
+    ingest([{'title': 'Свежая новость', 'text': 'Текст'}])
+    assert 'Свежая новость' in client.get(reverse(HOME_URL)).content.decode()
+
+
+@pytest.mark.django_db
+def test_authenticated_users_get_fresh_pages(
+    author_client, pk_for_args_new
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    author_client.get(url)
+    response = author_client.get(url)
+    assert 'form' in response.context
+
+
+@pytest.mark.django_db
+def test_stale_page_served_while_another_worker_rebuilds(
+    client, rf, new, django_assert_num_queries
+):
+    url = reverse(DETAIL_URL, args=(new.id,))
+    old_content = client.get(url).content
+    new.title = 'Новый заголовок'
+    new.save()
+    get_cache().add(f'{_page_key(rf.get(url))}:lock', 1)
+    with django_assert_num_queries(0):
+        assert client.get(url).content == old_content
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+import pytest
+from django.test.signals import template_rendered
+from django.urls import reverse
+
+from news.models import News
+
+HOME_URL = 'news:home'
+DETAIL_URL = 'news:detail'
+
+
+@pytest.fixture
+def rendered_templates():
+    templates = []
+
+    def on_render(sender, template, **kwargs):
+        templates.append(template.name)
+
+    template_rendered.connect(on_render)
+    yield templates
+    template_rendered.disconnect(on_render)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, args', (
+    (HOME_URL, None),
+    (DETAIL_URL, pytest.lazy_fixture('pk_for_args_new')),
+))
+def test_not_modified_without_rendering(
+    author_client, new, name, args, rendered_templates,
+    django_assert_num_queries
+):
+    url = reverse(name, args=args)
+    etag = author_client.get(url)['ETag']
+    rendered_templates.clear()
+    # Сессия, пользователь и один запрос за валидаторами.
+    with django_assert_num_queries(3):
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert rendered_templates == []
+
+
+@pytest.mark.django_db
+def test_if_modified_since(client, pk_for_args_new):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    last_modified = client.get(url)['Last-Modified']
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_new_login_changes_etag(author_client, author, pk_for_args_new):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    response = author_client.get(url)
+    # Токен CSRF в форме не проверить по дате изменения новости.
+    assert not response.has_header('Last-Modified')
+    etag = response['ETag']
+    author_client.logout()
+    author_client.force_login(author)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_deleted_news_changes_list(author_client, many_news):
+    url = reverse(HOME_URL)
+    response = author_client.get(url)
+    assert not response.has_header('Last-Modified')
+    etag = response['ETag']
+    News.objects.first().delete()
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_new_comment_changes_etag(
+    author_client, pk_for_args_new, form_data
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    etag = author_client.get(url)['ETag']
+    author_client.post(url, data=form_data)
+    response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_etag_differs_between_users(
+    admin_client, author_client, pk_for_args_new
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    assert admin_client.get(url)['ETag'] != author_client.get(url)['ETag']
+
+
+@pytest.mark.django_db
+def test_cached_anonymous_page_answers_not_modified(
+    client, pk_for_args_new, django_assert_num_queries
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
@@ -1,11 +1,17 @@
+from datetime import datetime, timedelta
+
 import pytest
 from django.conf import settings
+from django.db.models.signals import post_init
 from django.urls import reverse
 
+from conftest import COMMENTS_PER_NEWS
 from ..forms import CommentForm
+from ..models import Comment
 
 HOME_URL = 'news:home'
 DETAIL_URL = 'news:detail'
+COMMENTS_URL = 'news:comments'
 
 
 @pytest.mark.django_db
@@ -20,6 +26,30 @@ def test_news_count_and_sorted(client, many_news):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.django_db
+def test_home_page_counts_comments_without_loading_them(
+    client, news_with_many_comments, django_assert_num_queries
+):
+    loaded_comments = []
+
+    def on_init(sender, instance, **kwargs):
+        loaded_comments.append(instance)
+
+    post_init.connect(on_init, sender=Comment)
+    try:
+        # Валидаторы условного GET и список новостей с числом комментариев.
+        with django_assert_num_queries(2):
+            response = client.get(reverse(HOME_URL))
+    finally:
+        post_init.disconnect(on_init, sender=Comment)
+    assert not loaded_comments
+    assert all(
+        news.comment_count == COMMENTS_PER_NEWS
+        for news in response.context['object_list']
+    )
+    assert f'Комментариев: {COMMENTS_PER_NEWS}' in response.content.decode()
+
+
 @pytest.mark.django_db
 def test_comments_sorted(admin_client, pk_for_args_new, many_comments):
     url = reverse(DETAIL_URL, args=pk_for_args_new)
@@ -33,6 +63,58 @@ def test_comments_sorted(admin_client, pk_for_args_new, many_comments):
     assert all_dates == sorted_dates
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize('comments_count', (10, 10_000))
+def test_detail_page_size_does_not_depend_on_comments_count(
+    client, new, author, comments_count, django_assert_num_queries
+):
+    now = datetime.utcnow()
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                text='Текст', created=now + timedelta(seconds=index),
+                news=new, author=author,
+            )
+            for index in range(comments_count)
+        ),
+        batch_size=1000,
+    )
+    # Валидаторы условного GET, новость и страница комментариев.
+    with django_assert_num_queries(3):
+        response = client.get(reverse(DETAIL_URL, args=(new.id,)))
+    assert len(response.context['comments']) == min(
+        comments_count, settings.COMMENTS_COUNT_ON_PAGE
+    )
+    assert (
+        response.context['next_cursor'] is not None
+    ) == (comments_count > settings.COMMENTS_COUNT_ON_PAGE)
+
+
+@pytest.mark.django_db
+def test_comments_pages_cover_all_comments(
+    client, settings, new, author, pk_for_args_new
+):
+    settings.COMMENTS_COUNT_ON_PAGE = 3
+    created = datetime.utcnow()
+    Comment.objects.bulk_create(
+        Comment(text='Текст', created=created, news=new, author=author)
+        for _ in range(10)
+    )
+    response = client.get(reverse(DETAIL_URL, args=pk_for_args_new))
+    seen = [comment.id for comment in response.context['comments']]
+    next_cursor = response.context['next_cursor']
+    while next_cursor:
+        response = client.get(
+            reverse(COMMENTS_URL, args=pk_for_args_new),
+            {'cursor': next_cursor},
+        )
+        seen += [comment.id for comment in response.context['comments']]
+        next_cursor = response.context['next_cursor']
+    assert seen == list(
+        Comment.objects.order_by('created', 'id').values_list('id', flat=True)
+    )
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'parametrized_client, is_form_allowed',
@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+import tracemalloc
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from news.export import FIELDS
+from news.models import Comment
+
+EXPORT_URL = reverse('news:export_comments')
+DAYS = 5
+
+
+@pytest.fixture
+def comments_by_day(new, author):
+    """По комментарию в полдень каждого из последних DAYS дней."""
+    today = timezone.localdate()
+    for index in range(DAYS):
+        day = today - timedelta(days=index)
+        comment = Comment.objects.create(
+            text=f'Комментарий за {day}', news=new, author=author
+        )
+        # created заполняется при создании, поэтому меняем его отдельно.
+        Comment.objects.filter(pk=comment.pk).update(
+            created=timezone.make_aware(
+                datetime.combine(day, datetime.min.time())
+            ) + timedelta(hours=12)
+        )
+    return today
+
+
+def read_csv(response):
+    content = b''.join(response.streaming_content).decode()
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+@pytest.mark.django_db
+def test_staff_gets_streamed_csv(admin_client, comments_by_day):
+    response = admin_client.get(EXPORT_URL)
+    assert response.streaming
+    assert response['Content-Type'] == 'text/csv'
+    rows = read_csv(response)
+    assert len(rows) == DAYS
+    assert tuple(rows[0]) == FIELDS
+    assert rows[0]['author'] == 'Автор'
+    assert rows[0]['news_title'] == 'Текст заголовка'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('parametrized_client', (
+    pytest.lazy_fixture('client'), pytest.lazy_fixture('author_client'),
+))
+def test_export_is_staff_only(parametrized_client):
+    response = parametrized_client.get(EXPORT_URL)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_date_range_is_inclusive(admin_client, comments_by_day):
+    since = comments_by_day - timedelta(days=3)
+    until = comments_by_day - timedelta(days=1)
+    rows = read_csv(admin_client.get(EXPORT_URL, {
+        'since': since.isoformat(), 'until': until.isoformat(),
+    }))
+    assert [row['text'] for row in rows] == [
+        f'Комментарий за {since + timedelta(days=index)}'
+        for index in range(3)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', (
+    {'since': '18.10.2026'},
+    {'until': '2026-02-30'},
+    {'format': 'xml'},
+))
+def test_invalid_parameters(admin_client, params):
+    response = admin_client.get(EXPORT_URL, params)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_command_writes_jsonl(tmp_path, comments_by_day):
+    path = tmp_path / 'comments.jsonl'
+    err = io.StringIO()
+    call_command(
+        'export_comments', str(path),
+        since=comments_by_day.isoformat(), stderr=err,
+    )
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]['text'] == f'Комментарий за {comments_by_day}'
+    assert 'Выгружено комментариев: 1' in err.getvalue()
+    with pytest.raises(CommandError):
+        call_command('export_comments', str(path), since='вчера')
+
+
+@pytest.mark.django_db
+def test_command_writes_to_stdout(comments_by_day):
+    out = io.StringIO()
+    call_command(
+        'export_comments', '-', format='csv',
+        since=comments_by_day.isoformat(), stdout=out, stderr=io.StringIO(),
+    )
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == list(FIELDS)
+    assert len(rows) == 2
+
+
+def export_peak_memory(path, count, new, author):
+    """Пиковый прирост памяти при выгрузке count комментариев."""
+    Comment.objects.all().delete()
+    Comment.objects.bulk_create((
+        Comment(text=f'Комментарий {index}', news=new, author=author)
+        for index in range(count)
+    ), batch_size=1000)
+    tracemalloc.start()
+    try:
+        call_command(
+            'export_comments', str(path), chunk_size=500,
+            stderr=io.StringIO(),
+        )
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.django_db
+def test_memory_does_not_grow_with_rows(tmp_path, new, author):
+    path = tmp_path / 'comments.csv'
+    small = export_peak_memory(path, 2000, new, author)
+    large = export_peak_memory(path, 10000, new, author)
+    assert len(path.read_text().splitlines()) == 10001
+    assert large < small * 2
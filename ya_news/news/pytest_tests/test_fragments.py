@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+
+from news.cache import get_cache
+from news.fragments import _fragment_key
+from news.models import Comment
+
+DETAIL_URL = 'news:detail'
+EDIT_URL = 'news:edit'
+MANY_COMMENTS = 1000
+
+
+@pytest.mark.django_db
+def test_controls_only_for_own_comments(
+    author_client, admin_client, comment
+):
+    url = reverse(DETAIL_URL, args=(comment.news_id,))
+    edit_url = reverse(EDIT_URL, args=(comment.id,))
+    assert edit_url in author_client.get(url).content.decode()
+    content = admin_client.get(url).content.decode()
+    assert comment.text in content
+    assert edit_url not in content
+
+
+@pytest.mark.django_db
+def test_repeat_view_does_not_load_comments(
+    author_client, comment, django_assert_num_queries
+):
+    url = reverse(DETAIL_URL, args=(comment.news_id,))
+    author_client.get(url)
+    # Сессия, пользователь, валидаторы и новость; комментарии из кеша.
+    with django_assert_num_queries(4):
+        response = author_client.get(url)
+    assert comment.text in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_comment_change_renders_block_again(
+    author_client, comment, form_data
+):
+    url = reverse(DETAIL_URL, args=(comment.news_id,))
+    author_client.get(url)
+    author_client.post(reverse(EDIT_URL, args=(comment.id,)), form_data)
+    content = author_client.get(url).content.decode()
+    assert form_data['text'] in content
+    assert comment.text not in content
+
+
+@pytest.mark.django_db
+def test_large_block_is_served_from_cache(
+    settings, author_client, new, author, django_assert_num_queries
+):
+    settings.COMMENTS_COUNT_ON_PAGE = MANY_COMMENTS
+    Comment.objects.bulk_create(
+        Comment(text=f'Строка {index}\nещё строка', news=new, author=author)
+        for index in range(MANY_COMMENTS)
+    )
+    url = reverse(DETAIL_URL, args=(new.id,))
+    author_client.get(url)
+    new.refresh_from_db()
+    html, next_cursor = get_cache().get(_fragment_key(new, None))
+    assert next_cursor is None
+    assert html.count('<!--controls:') == MANY_COMMENTS
+    # В кеше метки, а не ссылки: блок общий для всех читателей.
+    assert reverse(EDIT_URL, args=(Comment.objects.first().id,)) not in html
+    # Сколько бы ни было комментариев, из базы читается только новость.
+    with django_assert_num_queries(4):
+        content = author_client.get(url).content.decode()
+    assert content.count('Редактировать') == MANY_COMMENTS
@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+
+from news.export import comments_between
+from news.models import Comment
+from news.views import CommentUpdate, NewsList
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+def make_view(view_class, user):
+    view = view_class()
+    view.request = RequestFactory().get('/')
+    view.request.user = user
+    return view
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'get_queryset, index',
+    (
+        (
+            lambda author: NewsList().get_queryset(),
+            'news_date_id_idx',
+        ),
+        (
+            lambda author: Comment.objects.filter(
+                news_id=1
+            ).order_by('created', 'pk')[:50],
+            'comment_news_created_id_idx',
+        ),
+        (
+            lambda author: make_view(CommentUpdate, author).get_queryset(),
+            'comment_author_created_id_idx',
+        ),
+        (
+            lambda author: comments_between(
+                date(2024, 1, 1), date(2024, 1, 31)
+            ),
+            'comment_created_id_idx',
+        ),
+    )
+)
+def test_hot_queries_use_indexes(author, get_queryset, index):
+    plan = query_plan(get_queryset(author))
+    assert index in plan
+    assert 'TEMP B-TREE' not in plan
@@ -1,15 +1,34 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
 from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
-from news.models import Comment, News
+from news.models import DUPLICATE_NEWS, Comment, News
 from news.forms import WARNING, BAD_WORDS
+from news.comment_queue import get_comment_queue, write_comments
+from news.ingest import ingest
+from news.moderation import get_matcher, normalize
 
 DETAIL_URL = 'news:detail'
 EDIT_URL = 'news:edit'
 DELETE_URL = 'news:delete'
+FEED_SIZE = 5_000
+FEED_UNIQUE = 4_000
+ADMIN_CHANGE_URL = 'admin:news_news_change'
+ADMIN_ADD_URL = 'admin:news_news_add'
+PARALLEL_COMMENTS = 8
+MATCHERS = (
+    'news.moderation.AhoCorasickMatcher',
+    'news.moderation.RegexMatcher',
+)
 
 
 @pytest.mark.django_db
@@ -44,6 +63,59 @@ def test_bad_text(author_client, pk_for_args_new, form_data):
     assert Comment.objects.count() == 0
 
 
+def test_bad_text_with_latin_homoglyphs(
+    author_client, pk_for_args_new, form_data
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    form_data['text'] = 'Ну ты и PeдиCKa!'
+    response = author_client.post(url, data=form_data)
+    assertFormError(response, 'form', 'text', errors=(WARNING))
+    assert Comment.objects.count() == 0
+
+
+def test_bad_text_page_keeps_comments(
+    author_client, pk_for_args_new, form_data, comment
+):
+    url = reverse(DETAIL_URL, args=pk_for_args_new)
+    form_data['text'] = BAD_WORDS[0]
+    response = author_client.post(url, data=form_data)
+    assertFormError(response, 'form', 'text', errors=(WARNING))
+    assert comment.text in response.content.decode()
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.parametrize('matcher', MATCHERS)
+@pytest.mark.parametrize('words_count', (10, 1_000, 50_000))
+def test_matcher_on_large_word_lists(settings, matcher, words_count):
+    settings.BAD_WORDS_MATCHER = matcher
+    words = [f'плохоеслово{index}' for index in range(words_count)]
+    search = get_matcher(words).search
+    assert search(normalize(f'Текст с плохоеслово{words_count - 1} внутри'))
+    assert not search(normalize('Совершенно обычный комментарий'))
+
+
+def test_matcher_rebuilt_when_words_file_changes(settings, tmp_path):
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('первое\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    matcher = get_matcher(BAD_WORDS)
+    assert get_matcher(BAD_WORDS) is matcher
+    assert matcher.search('первое')
+    assert not matcher.search(normalize(BAD_WORDS[0]))
+    words_file.write_text('второе\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 0))
+    matcher = get_matcher(BAD_WORDS)
+    assert matcher.search('второе')
+    assert not matcher.search('первое')
+
+
+def test_matcher_reused_for_same_words(settings):
+    matcher = get_matcher(BAD_WORDS)
+    assert get_matcher(BAD_WORDS) is matcher
+    settings.BAD_WORDS_MATCHER = MATCHERS[-1]
+    assert get_matcher(BAD_WORDS) is not matcher
+
+
 def test_author_can_edit_note(author_client, form_data, comment, author):
     url = reverse(EDIT_URL, args=(comment.id,))
     response = author_client.post(url, form_data)
@@ -86,3 +158,175 @@ def test_other_user_cant_delete_comment(
     assert Comment.objects.get().text == 'Текст комментария'
     assert Comment.objects.get().news == News.objects.get()
     assert Comment.objects.get().author == author
+
+
+def synthetic_feed():
+    for index in range(FEED_SIZE):
+        number = index % FEED_UNIQUE
+        yield {
+            'title': f'Новость {number}',
+            'text': f'Текст новости {number}',
+            'date': '2022-11-01',
+        }
+
+
+@pytest.mark.django_db
+def test_ingest_deduplicates_and_is_rerunnable():
+    result = ingest(synthetic_feed(), batch_size=300)
+    assert (result.created, result.skipped) == (
+        FEED_UNIQUE, FEED_SIZE - FEED_UNIQUE
+    )
+    assert News.objects.count() == FEED_UNIQUE
+    result = ingest(synthetic_feed(), batch_size=300)
+    assert (result.created, result.skipped) == (0, FEED_SIZE)
+    assert News.objects.count() == FEED_UNIQUE
+
+
+@pytest.mark.django_db
+def test_ingest_skips_news_created_by_editors(new, tmp_path):
+    feed = tmp_path / 'feed.jsonl'
+    feed.write_text(
+        json.dumps({'title': new.title, 'text': new.text}), encoding='utf-8'
+    )
+    out = StringIO()
+    call_command('ingest_news', str(feed), stdout=out)
+    assert 'Добавлено новостей: 0, повторов пропущено: 1' in out.getvalue()
+    assert News.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_ingest_skips_rows_with_bad_dates(caplog):
+    result = ingest([
+        {'title': 'Без числа', 'text': 'Текст', 'date': '2022-02-30'},
+        {'title': 'Не дата', 'text': 'Текст', 'date': 'вчера'},
+        {'title': 'Хорошая', 'text': 'Текст', 'date': '2022-11-01'},
+    ])
+    assert (result.created, result.skipped) == (1, 2)
+    assert News.objects.get().title == 'Хорошая'
+    assert 'неверная дата' in caplog.text
+
+
+@pytest.mark.django_db
+def test_admin_rejects_duplicate_news(admin_client, new):
+    response = admin_client.post(reverse(ADMIN_ADD_URL), {
+        'title': new.title,
+        'text': new.text,
+        'date': new.date.strftime('%d.%m.%Y'),
+        'comment_set-TOTAL_FORMS': 0,
+        'comment_set-INITIAL_FORMS': 0,
+    })
+    assert response.status_code == HTTPStatus.OK
+    assert DUPLICATE_NEWS in response.content.decode()
+    assert News.objects.count() == 1
+
+
+def comment_count(news):
+    news.refresh_from_db(fields=('comment_count',))
+    return news.comment_count
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_create_and_delete(
+    author_client, new, form_data, pk_for_args_new
+):
+    author_client.post(reverse(DETAIL_URL, args=pk_for_args_new), form_data)
+    author_client.post(reverse(DETAIL_URL, args=pk_for_args_new), form_data)
+    assert comment_count(new) == 2
+    author_client.post(reverse(DELETE_URL, args=(Comment.objects.first().id,)))
+    assert comment_count(new) == 1
+
+
+@pytest.mark.django_db
+def test_admin_inline_delete_updates_comment_count(admin_client, comment):
+    new = comment.news
+    assert comment_count(new) == 1
+    response = admin_client.post(reverse(ADMIN_CHANGE_URL, args=(new.id,)), {
+        'title': new.title,
+        'text': new.text,
+        'date': new.date.strftime('%d.%m.%Y'),
+        'comment_set-TOTAL_FORMS': 1,
+        'comment_set-INITIAL_FORMS': 1,
+        'comment_set-0-id': comment.id,
+        'comment_set-0-news': new.id,
+        'comment_set-0-author': comment.author_id,
+        'comment_set-0-text': comment.text,
+        'comment_set-0-DELETE': 'on',
+    })
+    assert response.status_code == HTTPStatus.FOUND
+    assert comment_count(new) == 0
+
+
+@pytest.mark.django_db
+def test_recount_comments_fixes_drift(new, many_news, comment):
+    News.objects.update(comment_count=7)
+    out = StringIO()
+    call_command('recount_comments', batch_size=3, stdout=out)
+    assert 'Исправлено счётчиков: ' in out.getvalue()
+    assert News.objects.filter(comment_count=7).count() == 0
+    assert comment_count(new) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_count_under_parallel_posting(author, new, form_data):
+    clients = []
+    for _ in range(PARALLEL_COMMENTS):
+        client = Client()
+        client.force_login(author)
+        clients.append(client)
+    url = reverse(DETAIL_URL, args=(new.id,))
+
+    def post(client):
+        try:
+            return client.post(url, form_data).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(PARALLEL_COMMENTS) as executor:
+        statuses = list(executor.map(post, clients))
+    assert statuses == [HTTPStatus.FOUND] * PARALLEL_COMMENTS
+    assert comment_count(new) == PARALLEL_COMMENTS
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_behind_comments(
+    settings, author_client, new, form_data, django_assert_num_queries
+):
+    settings.NEWS_COMMENT_WRITE_BEHIND = True
+    url = reverse(DETAIL_URL, args=(new.id,))
+    # Сессия, пользователь и новость; комментарий пишет фоновый поток.
+    with django_assert_num_queries(3):
+        response = author_client.post(url, form_data)
+    assertRedirects(response, f'{url}#comments')
+    for _ in range(PARALLEL_COMMENTS - 1):
+        author_client.post(url, form_data)
+    get_comment_queue().flush()
+    assert Comment.objects.filter(news=new).count() == PARALLEL_COMMENTS
+    assert comment_count(new) == PARALLEL_COMMENTS
+    assert form_data['text'] in author_client.get(url).content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bad_comment_does_not_drop_batch(author, new, caplog):
+    gone_id = News.objects.create(title='Удалённая', text='Текст').id
+    comments = [
+        Comment(text=f'Комментарий {index}', news=new, author=author)
+        for index in range(PARALLEL_COMMENTS)
+    ]
+    # Новость удалили, пока комментарий ждал в очереди.
+    comments.insert(3, Comment(
+        text='Потерянный', news_id=gone_id, author=author
+    ))
+    News.objects.filter(pk=gone_id).delete()
+    write_comments(comments)
+    assert Comment.objects.count() == PARALLEL_COMMENTS
+    assert comment_count(new) == PARALLEL_COMMENTS
+    assert f'комментарий к новости {gone_id}' in caplog.text
+
+
+@pytest.mark.django_db(transaction=True)
+def test_comment_benchmark():
+    out = StringIO()
+    call_command('comment_benchmark', threads=2, comments=10, stdout=out)
+    modes = [line.split('\t')[0] for line in out.getvalue().splitlines()]
+    assert modes == ['mode', 'sync', 'queue']
+    assert not Comment.objects.exists()
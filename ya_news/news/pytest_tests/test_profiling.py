@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template.backends.django import Template
+from django.urls import reverse
+
+from news.profiling import ProfilingMiddleware, install_profiler
+
+DETAIL_URL = 'news:detail'
+SLOW_RENDER = 0.05
+
+
+@pytest.mark.django_db
+def test_profiled_request(client, settings, caplog, comment):
+    settings.PROFILING_SAMPLE_RATE = 1
+    with caplog.at_level('INFO', logger='news.profiling'):
+        response = client.get(reverse(DETAIL_URL, args=(comment.news_id,)))
+    assert 'sql;dur=' in response['Server-Timing']
+    assert 'tpl;dur=' in response['Server-Timing']
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['url_name'] == DETAIL_URL
+    # Новость, комментарии и отметка времени для ETag: лишний запрос
+    # окупается ответами 304 без рендеринга.
+    assert record['sql_count'] == 3
+    assert record['total_ms'] >= record['sql_ms'] + record['template_ms']
+
+
+@pytest.mark.django_db
+def test_template_time_is_measured(
+        client, settings, caplog, monkeypatch, pk_for_args_new
+):
+    settings.PROFILING_SAMPLE_RATE = 1
+    render = Template.render
+
+    def slow_render(self, *args, **kwargs):
+        time.sleep(SLOW_RENDER)
+        return render(self, *args, **kwargs)
+    monkeypatch.setattr(Template, 'render', slow_render)
+    with caplog.at_level('INFO', logger='news.profiling'):
+        client.get(reverse(DETAIL_URL, args=pk_for_args_new))
+    record = json.loads(caplog.records[-1].getMessage())
+    # View рендерит шаблон сам, ещё до middleware.
+    assert record['template_ms'] >= SLOW_RENDER * 1000
+
+
+@pytest.mark.django_db
+def test_profiling_disabled_by_default(client, pk_for_args_new):
+    response = client.get(reverse(DETAIL_URL, args=pk_for_args_new))
+    assert not response.has_header('Server-Timing')
+
+
+def test_middleware_chain_stays_async(settings):
+    settings.PROFILING_SAMPLE_RATE = 1
+    # Иначе Django выполняет всю цепочку под ASGI в одном потоке.
+    assert asyncio.iscoroutinefunction(ASGIHandler()._middleware_chain)
+
+
+@pytest.mark.django_db
+def test_profiled_async_request(rf, settings, caplog):
+    settings.PROFILING_SAMPLE_RATE = 1
+    # Соединение теста открыто ещё до включения профилирования.
+    install_profiler(connection)
+
+    def query():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    async def view(request):
+        await sync_to_async(query)()
+        return HttpResponse()
+    middleware = ProfilingMiddleware(view)
+    assert asyncio.iscoroutinefunction(middleware)
+    with caplog.at_level('INFO', logger='news.profiling'):
+        response = async_to_sync(middleware)(rf.get('/'))
+    assert '1 queries' in response['Server-Timing']
+    assert json.loads(caplog.records[-1].getMessage())['sql_count'] == 1
+
+
+def test_profile_report(tmp_path):
+    log = tmp_path / 'profile.log'
+    log.write_text('\n'.join(
+        'INFO news.profiling ' + json.dumps(
+            {'url_name': 'news:home', 'total_ms': float(total)}
+        )
+        for total in range(1, 101)
+    ) + '\nпосторонняя строка\n', encoding='utf-8')
+    out = StringIO()
+    call_command('profile_report', str(log), stdout=out)
+    assert 'news:home\t100\t50.00\t95.00\t99.00' in out.getvalue()
@@ -0,0 +1,109 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.urls import reverse
+
+from news.models import Comment, News
+from news.replicas import PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter
+
+HOME_URL = 'news:home'
+DETAIL_URL = 'news:detail'
+REPLICA = 'replica'
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """
+    Вторая база SQLite, которая отстаёт от основной.
+
+    sync() копирует в неё текущее состояние основной базы.
+    """
+    path = tmp_path / 'replica.sqlite3'
+
+    def sync():
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+        connections[REPLICA].close()
+
+    connections.databases[REPLICA] = {
+        **connections.databases['default'], 'NAME': str(path), 'TEST': {}
+    }
+    settings.DATABASE_REPLICAS = [REPLICA]
+    sync()
+    yield sync
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_go_to_replica(author_client, new, replica):
+    fresh = News.objects.create(title='Только в основной', text='Текст')
+    content = author_client.get(reverse(HOME_URL)).content.decode()
+    assert new.title in content
+    assert fresh.title not in content
+    replica()
+    content = author_client.get(reverse(HOME_URL)).content.decode()
+    assert fresh.title in content
+
+
+@pytest.mark.django_db(transaction=True)
+def test_page_cache_is_filled_from_primary(client, new, replica):
+    client.get(reverse(HOME_URL))
+    # Запись сбрасывает кеш, а реплика ещё не догнала основную базу.
+    fresh = News.objects.create(title='Только в основной', text='Текст')
+    assert fresh.title in client.get(reverse(HOME_URL)).content.decode()
+    assert not News.objects.using(REPLICA).filter(pk=fresh.pk).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writer_reads_own_writes(author_client, new, form_data, replica):
+    replica()
+    url = reverse(DETAIL_URL, args=(new.id,))
+    response = author_client.post(url, form_data)
+    assert PIN_COOKIE in response.cookies
+    assert Comment.objects.using('default').count() == 1
+    assert Comment.objects.using(REPLICA).count() == 0
+    assert form_data['text'] in author_client.get(url).content.decode()
+    del author_client.cookies[PIN_COOKIE]
+    assert form_data['text'] not in author_client.get(url).content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_without_replicas_use_primary(client, new):
+    response = client.get(reverse(HOME_URL))
+    assert PIN_COOKIE not in response.cookies
+    assert new.title in response.content.decode()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_profile_counts_replica_queries(
+        author_client, settings, caplog, replica
+):
+    settings.PROFILING_SAMPLE_RATE = 1
+    with caplog.at_level('INFO', logger='news.profiling'):
+        author_client.get(reverse(HOME_URL))
+    record = json.loads(caplog.records[-1].getMessage())
+    # Сессия и пользователь из основной базы, валидаторы и список
+    # новостей с реплики.
+    assert record['sql_count'] == 4
+
+
+def test_pin_middleware_under_asgi(rf):
+    async def view(request):
+        # Синхронная часть view под ASGI выполняется в потоке.
+        await sync_to_async(ReplicaRouter().db_for_write)(News)
+        return HttpResponse()
+    middleware = ReplicaPinMiddleware(view)
+    assert asyncio.iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(rf.post('/'))
+    assert PIN_COOKIE in response.cookies
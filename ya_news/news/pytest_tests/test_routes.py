@@ -5,7 +5,9 @@ from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
 HOME_URL = 'news:home'
+SEARCH_URL = 'news:search'
 DETAIL_URL = 'news:detail'
+COMMENTS_URL = 'news:comments'
 EDIT_URL = 'news:edit'
 DELETE_URL = 'news:delete'
 LOGIN_URL = 'users:login'
@@ -20,7 +22,9 @@ lazy_comment = pytest.lazy_fixture('pk_for_args_comment')
     'clients, name, args, expected_status',  # как ли сделать args внутри name?
     [
         (pytest.lazy_fixture('client'), HOME_URL, None, HTTPStatus.OK),
+        (pytest.lazy_fixture('client'), SEARCH_URL, None, HTTPStatus.OK),
         (pytest.lazy_fixture('client'), DETAIL_URL, lazy_new, HTTPStatus.OK),
+        (pytest.lazy_fixture('client'), COMMENTS_URL, lazy_new, HTTPStatus.OK),
         (pytest.lazy_fixture('client'), LOGIN_URL, None, HTTPStatus.OK),
         (pytest.lazy_fixture('client'), LOGOUT_URL, None, HTTPStatus.OK),
         (pytest.lazy_fixture('client'), SIGNUP_URL, None, HTTPStatus.OK),
@@ -42,6 +46,14 @@ def test_pages_availability_for_different_users(
     assert response.status_code == expected_status
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', (DETAIL_URL, COMMENTS_URL))
+def test_invalid_cursor(client, name, pk_for_args_new):
+    url = reverse(name, args=pk_for_args_new)
+    response = client.get(url, {'cursor': 'not-a-cursor'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 @pytest.mark.parametrize(
     'name, args',
     (
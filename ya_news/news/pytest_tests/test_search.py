@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from news.ingest import ingest
+from news.models import News
+from news.search import _fallback_search, fts_query, search_news
+
+SEARCH_URL = 'news:search'
+
+
+@pytest.fixture
+def stories():
+    return News.objects.bulk_create((
+        News(title='Погода', text='В Москве ожидается сильный снегопад.'),
+        News(title='Снегопад парализовал город', text='Пробки до вечера.'),
+        News(title='Спорт', text='Футбольный матч перенесли.'),
+    ))
+
+
+@pytest.mark.django_db
+def test_ranked_results_with_highlighted_snippet(stories):
+    results, has_next = search_news('снегопад')
+    assert [news.title for news in results] == [
+        'Снегопад парализовал город', 'Погода'
+    ]
+    assert not has_next
+    assert '<mark>снегопад</mark>' in results[1].snippet
+
+
+@pytest.mark.django_db
+def test_index_follows_changes(stories):
+    weather = News.objects.get(title='Погода')
+    weather.text = 'Солнечно и тепло.'
+    weather.save()
+    News.objects.filter(title='Спорт').delete()
+    ingest([{'title': 'Хоккей', 'text': 'Сильный снегопад не помешал.'}])
+    titles = {news.title for news in search_news('снегопад').results}
+    assert titles == {'Снегопад парализовал город', 'Хоккей'}
+    assert search_news('футбольный').results == []
+
+
+@pytest.mark.django_db
+def test_query_syntax_and_markup_are_escaped(new):
+    new.text = 'Тег <script>alert(1)</script> и NEAR("a" b)'
+    new.save()
+    assert fts_query('NEAR("a" b) OR') == '"near"* "a"* "b"* "or"*'
+    snippet = search_news('alert').results[0].snippet
+    assert '<script>' not in snippet
+    assert '&lt;script&gt;' in snippet
+
+
+@pytest.mark.django_db
+def test_search_pages(client, settings, stories):
+    settings.NEWS_SEARCH_PAGE_SIZE = 1
+    url = reverse(SEARCH_URL)
+    first = client.get(url, {'q': 'снегопад'})
+    second = client.get(url, {'q': 'снегопад', 'page': 2})
+    assert [news.title for news in first.context['results']] == [
+        'Снегопад парализовал город'
+    ]
+    assert first.context['next_page'] == 2
+    assert [news.title for news in second.context['results']] == ['Погода']
+    assert second.context['next_page'] is None
+    response = client.get(url, {'q': 'снегопад', 'page': 'x'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_fallback_search(stories):
+    results = _fallback_search(['матч'], 10, 0)
+    assert [news.title for news in results] == ['Спорт']
+    assert results[0].snippet == 'Футбольный матч перенесли.'
+
+
+@pytest.mark.django_db
+def test_fts_objects_survive_migrations():
+    # Тестовая база собрана всеми миграциями: если поздняя миграция
+    # пересоздаст news_news, триггеры пропадут отсюда.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master"
+            " WHERE type = 'trigger' OR name = 'news_news_fts'"
+        )
+        objects = set(cursor.fetchall())
+    assert objects == {
+        ('table', 'news_news_fts'),
+        ('trigger', 'news_news_fts_insert'),
+        ('trigger', 'news_news_fts_delete'),
+        ('trigger', 'news_news_fts_update'),
+    }
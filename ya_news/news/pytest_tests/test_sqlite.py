@@ -0,0 +1,63 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+def test_pragmas_applied_on_new_connections(settings, tmp_path):
+    settings.SQLITE_PRAGMAS = settings.SQLITE_PERFORMANCE_PRAGMAS
+    wrapper = DatabaseWrapper({
+        **connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')
+    })
+    try:
+        assert pragma(wrapper, 'journal_mode') == 'wal'
+        assert pragma(wrapper, 'synchronous') == 1
+        assert pragma(wrapper, 'busy_timeout') == 5000
+    finally:
+        wrapper.close()
+
+
+@pytest.mark.django_db
+def test_default_profile_keeps_sqlite_defaults(settings, tmp_path):
+    settings.SQLITE_PRAGMAS = {}
+    wrapper = DatabaseWrapper({
+        **connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')
+    })
+    try:
+        assert pragma(wrapper, 'journal_mode') == 'delete'
+    finally:
+        wrapper.close()
+
+
+@pytest.mark.django_db
+def test_sqlite_benchmark():
+    out = StringIO()
+    call_command(
+        'sqlite_benchmark', readers=2, writers=1, operations=5, stdout=out
+    )
+    rows = [line.split('\t') for line in out.getvalue().splitlines()]
+    assert [row[0] for row in rows] == ['profile', 'default', 'performance']
+    assert all(row[-1] == '0' for row in rows[1:])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transaction_takes_write_lock_at_start():
+    other = connection.copy()
+    try:
+        with transaction.atomic():
+            connection.cursor().execute('SELECT 1')
+            with other.cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout = 0')
+                with pytest.raises(OperationalError, match='locked'):
+                    cursor.execute('BEGIN IMMEDIATE')
+    finally:
+        other.close()
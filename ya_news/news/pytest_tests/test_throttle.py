@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news import throttle
+from news.models import Comment
+from news.throttle import CacheBuckets, LocalBuckets, get_stats
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def buckets(monkeypatch, clock):
+    buckets = LocalBuckets(clock)
+    monkeypatch.setattr(throttle, 'get_buckets', lambda: buckets)
+    return buckets
+
+
+@pytest.mark.parametrize('backend', (LocalBuckets, CacheBuckets))
+def test_burst_then_refill(backend, clock):
+    buckets = backend(clock)
+    waits = [buckets.take('key', 5, 60) for _ in range(6)]
+    assert waits[:5] == [0] * 5
+    assert waits[5] == pytest.approx(12)
+    # Другой ключ расходует свой бакет.
+    assert buckets.take('other', 5, 60) == 0
+    clock.advance(12)
+    assert buckets.take('key', 5, 60) == 0
+    assert buckets.take('key', 5, 60) > 0
+    clock.advance(600)
+    assert [buckets.take('key', 5, 60) for _ in range(5)] == [0] * 5
+
+
+def test_full_buckets_are_pruned(monkeypatch, clock):
+    monkeypatch.setattr(throttle, 'MAX_LOCAL_BUCKETS', 2)
+    buckets = LocalBuckets(clock)
+    buckets.take('first', 5, 60)
+    clock.advance(60)
+    buckets.take('second', 5, 60)
+    buckets.take('third', 5, 60)
+    assert set(buckets.buckets) == {'second', 'third'}
+
+
+def post_comment(client, new):
+    return client.post(
+        reverse('news:detail', args=(new.id,)), data={'text': 'Спам'}
+    )
+
+
+@pytest.mark.django_db
+def test_comment_burst_is_throttled_per_user(
+        settings, buckets, clock, author_client, new
+):
+    settings.NEWS_THROTTLE_RATES = {'comment': {'user': (3, 60)}}
+    for _ in range(3):
+        assert post_comment(author_client, new).status_code == HTTPStatus.FOUND
+    response = post_comment(author_client, new)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response['Retry-After'] == '20'
+    assert Comment.objects.count() == 3
+    assert get_stats('comment') == {'ip': 0, 'user': 1}
+    clock.advance(20)
+    assert post_comment(author_client, new).status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.django_db
+def test_rejection_by_ip_makes_no_queries(
+        settings, buckets, author_client, new, django_assert_num_queries
+):
+    settings.NEWS_THROTTLE_RATES = {'comment': {'ip': (1, 60)}}
+    post_comment(author_client, new)
+    with django_assert_num_queries(0):
+        response = post_comment(author_client, new)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert get_stats('comment') == {'ip': 1, 'user': 0}
+
+
+@pytest.mark.django_db
+def test_reading_is_not_throttled(settings, buckets, client, new):
+    settings.NEWS_THROTTLE_RATES = {'comment': {'ip': (1, 60)}}
+    for _ in range(3):
+        response = client.get(reverse('news:detail', args=(new.id,)))
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_ip_taken_from_configured_header(
+        settings, buckets, author_client, new
+):
+    settings.NEWS_THROTTLE_RATES = {'comment': {'ip': (1, 60)}}
+    settings.NEWS_THROTTLE_IP_HEADER = 'HTTP_X_FORWARDED_FOR'
+    url = reverse('news:detail', args=(new.id,))
+    statuses = [
+        author_client.post(
+            url, data={'text': 'Спам'}, HTTP_X_FORWARDED_FOR=forwarded
+        ).status_code
+        for forwarded in ('10.0.0.1', '10.0.0.2', '1.2.3.4, 10.0.0.1')
+    ]
+    # Все запросы пришли с одного REMOTE_ADDR — адреса прокси.
+    assert statuses == [
+        HTTPStatus.FOUND, HTTPStatus.FOUND, HTTPStatus.TOO_MANY_REQUESTS
+    ]
+
+
+@pytest.mark.django_db
+def test_forwarded_header_ignored_by_default(
+        settings, buckets, author_client, new
+):
+    settings.NEWS_THROTTLE_RATES = {'comment': {'ip': (1, 60)}}
+    url = reverse('news:detail', args=(new.id,))
+    statuses = [
+        author_client.post(
+            url, data={'text': 'Спам'}, HTTP_X_FORWARDED_FOR=forwarded
+        ).status_code
+        for forwarded in ('10.0.0.1', '10.0.0.2')
+    ]
+    assert statuses == [HTTPStatus.FOUND, HTTPStatus.TOO_MANY_REQUESTS]
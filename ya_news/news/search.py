@@ -0,0 +1,86 @@
+"""
+Полнотекстовый поиск по новостям.
+
+В SQLite запрос идёт в таблицу FTS5 news_news_fts: результаты
+упорядочены по bm25 с большим весом заголовка, а в отрывке текста
+выделены найденные слова. На других базах используется icontains
+без ранжирования.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import News
+
+WORD = re.compile(r'\w+')
+# Метки выделения не встречаются в тексте и переживают escape().
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_WORDS = 16
+TITLE_WEIGHT = 10.0
+
+SearchPage = namedtuple('SearchPage', ('results', 'has_next'))
+
+FTS_SEARCH = f"""
+    SELECT news_news.*, snippet(
+        news_news_fts, 1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_WORDS}
+    ) AS snippet
+    FROM news_news_fts
+    JOIN news_news ON news_news.id = news_news_fts.rowid
+    WHERE news_news_fts MATCH %s
+    ORDER BY bm25(news_news_fts, {TITLE_WEIGHT}, 1.0)
+    LIMIT %s OFFSET %s
+"""
+
+
+def fts_query(query):
+    """
+    Запрос FTS5 из пользовательского ввода.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в вводе не
+    ломали синтаксис, и ищется как префикс.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query.lower()))
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def _fts_search(query, limit, offset):
+    results = list(News.objects.raw(FTS_SEARCH, (query, limit, offset)))
+    for news in results:
+        news.snippet = highlight(news.snippet)
+    return results
+
+
+def _fallback_search(words, limit, offset):
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    results = list(News.objects.filter(condition)[offset:offset + limit])
+    for news in results:
+        news.snippet = Truncator(news.text).words(SNIPPET_WORDS)
+    return results
+
+
+def search_news(query, page=1, page_size=20):
+    """Страница результатов поиска; COUNT по индексу не выполняется."""
+    words = WORD.findall(query)
+    if not words:
+        return SearchPage([], False)
+    offset = (page - 1) * page_size
+    # Лишняя запись показывает, есть ли следующая страница.
+    if connections[router.db_for_read(News)].vendor == 'sqlite':
+        results = _fts_search(fts_query(query), page_size + 1, offset)
+    else:
+        results = _fallback_search(words, page_size + 1, offset)
+    return SearchPage(results[:page_size], len(results) > page_size)
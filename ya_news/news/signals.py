@@ -0,0 +1,38 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Comment, News
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_pages(sender, **kwargs):
+    bump_version()
+
+
+def touch_news(news_id, **fields):
+    """Отметка времени новости служит валидатором для условных GET."""
+    News.objects.filter(pk=news_id).update(updated=timezone.now(), **fields)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        touch_news(instance.news_id, comment_count=F('comment_count') + 1)
+    else:
+        touch_news(instance.news_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Разошедшийся счётчик не уходит в минус; его поправит сверка.
+    touch_news(
+        instance.news_id,
+        comment_count=Greatest(F('comment_count') - 1, 0),
+    )
@@ -1,16 +1,55 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, async_views, views
 
 app_name = 'news'
 
+
+def read_view(name, sync_view, async_view):
+    """Асинхронная view, если имя адреса указано в NEWS_ASYNC_VIEWS."""
+    if name in settings.NEWS_ASYNC_VIEWS:
+        return async_view
+    return sync_view
+
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path(
+        '',
+        read_view('home', views.NewsList.as_view(), async_views.news_list),
+        name='home'
+    ),
+    path(
+        'news/<int:pk>/',
+        read_view(
+            'detail', views.NewsDetailView.as_view(), async_views.news_detail
+        ),
+        name='detail'
+    ),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'export/comments/',
+        views.CommentExport.as_view(),
+        name='export_comments'
+    ),
+    path('api/news/', api.NewsListApi.as_view(), name='api_list'),
+    path(
+        'api/news/<int:pk>/', api.NewsDetailApi.as_view(), name='api_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.CommentsApi.as_view(),
+        name='api_comments'
+    ),
 ]
@@ -1,53 +1,184 @@
+import hashlib
+
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.exceptions import BadRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from django.views import generic
 
+from .budget import QueryBudgetMixin
+from .cache import AnonymousPageCacheMixin
+from .comment_queue import get_comment_queue
+from .conditional import ConditionalGetMixin, csrf_validator
+from .export import (
+    CONTENT_TYPES, INVALID_FORMAT, comment_rows, parse_day, render_chunks
+)
 from .forms import CommentForm
+from .fragments import add_comment_controls, get_comments_block
 from .models import Comment, News
+from .pagination import get_comments_page
+from .replicas import ReplicaReadMixin
+from .search import search_news
+from .throttle import ThrottleMixin
+
+INVALID_PAGE = 'Номер страницы должен быть положительным числом.'
 
 
-class NewsList(generic.ListView):
+class NewsList(
+        QueryBudgetMixin,
+        ReplicaReadMixin,
+        AnonymousPageCacheMixin,
+        ConditionalGetMixin,
+        generic.ListView
+):
     """Список новостей."""
     model = News
+    query_budget = 4
     template_name = 'news/home.html'
 
+    def get_validators(self):
+        """Отметки времени новостей с главной, по индексу (-date, -id)."""
+        rows = list(self.model.objects.values_list(
+            'id', 'updated'
+        )[:settings.NEWS_COUNT_ON_HOME_PAGE])
+        if not rows:
+            return None, None
+        digest = hashlib.md5(repr(rows).encode()).hexdigest()
+        etag = f'{self.request.user.pk or 0}-{digest}'
+        # Без Last-Modified: удаление новости не увеличивает max(updated),
+        # а ETag меняется вместе с составом списка.
+        return etag, None
+
     def get_queryset(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев хранится в самой новости.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+
+class CommentsPageMixin:
+    """
+    Добавляет в контекст страницу комментариев новости.
 
+    Разметка блока берётся из кеша, а сами комментарии загружаются,
+    только если блок пришлось рендерить или к ним обратились явно.
+    """
 
-class NewsDetail(generic.DetailView):
+    def get_comments_context(self, news):
+        cursor = self.request.GET.get('cursor')
+        page = SimpleLazyObject(lambda: get_comments_page(
+            news.comment_set.select_related('author'),
+            cursor,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        ))
+        html, next_cursor = get_comments_block(news, cursor, lambda: page)
+        return {
+            'news': news,
+            'comments': SimpleLazyObject(lambda: page[0]),
+            'next_cursor': next_cursor,
+            'comments_block': add_comment_controls(html, self.request.user),
+        }
+
+
+class NewsDetail(
+        QueryBudgetMixin,
+        ReplicaReadMixin,
+        AnonymousPageCacheMixin,
+        ConditionalGetMixin,
+        CommentsPageMixin,
+        generic.DetailView
+):
     model = News
+    query_budget = 5
     template_name = 'news/detail.html'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
+    def get_validators(self):
+        updated = self.model.objects.filter(
             pk=self.kwargs['pk']
+        ).values_list('updated', flat=True).first()
+        if updated is None:
+            return None, None
+        etag = (
+            f'{self.kwargs["pk"]}-{updated.timestamp()}'
+            f'-{self.request.user.pk or 0}'
         )
-        return obj
+        if not self.request.user.is_authenticated:
+            return etag, updated
+        # На странице форма с токеном CSRF: он устаревает независимо от
+        # новости, и по одной дате изменения этого не понять.
+        return f'{etag}-{csrf_validator(self.request)}', None
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object))
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsComments(
+        QueryBudgetMixin,
+        ReplicaReadMixin,
+        CommentsPageMixin,
+        generic.TemplateView
+):
+    """Следующие страницы комментариев без остальной разметки."""
+    query_budget = 4
+    template_name = 'news/includes/comments_block.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        news = get_object_or_404(News, pk=self.kwargs['pk'])
+        context.update(self.get_comments_context(news))
+        return context
+
+
+class NewsSearch(QueryBudgetMixin, ReplicaReadMixin, generic.TemplateView):
+    """Поиск по новостям с постраничным выводом."""
+    query_budget = 3
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = self.request.GET.get('page', '1')
+        if not page.isdigit() or int(page) < 1:
+            raise BadRequest(INVALID_PAGE)
+        page = int(page)
+        results, has_next = search_news(
+            query, page, settings.NEWS_SEARCH_PAGE_SIZE
+        )
+        context.update(
+            query=query,
+            results=results,
+            page=page,
+            previous_page=page - 1,
+            next_page=page + 1 if has_next else None,
+        )
+        return context
+
+
 class NewsComment(
+        ThrottleMixin,
+        QueryBudgetMixin,
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
     model = News
+    query_budget = 5
+    throttle_scope = 'comment'
     form_class = CommentForm
     template_name = 'news/detail.html'
 
@@ -55,16 +186,31 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        # Отклонённый комментарий показывается на той же странице новости.
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comments_context(self.object))
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        if settings.NEWS_COMMENT_WRITE_BEHIND:
+            get_comment_queue().put(comment)
+        else:
+            self.save_comment(comment)
         return super().form_valid(form)
 
+    @transaction.atomic
+    def save_comment(self, comment):
+        """Комментарий и счётчик новости сохраняются в одной транзакции."""
+        comment.save()
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,19 +224,21 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(QueryBudgetMixin, LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
+    query_budget = 5
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +250,38 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        return super().delete(request, *args, **kwargs)
+
+
+class CommentExport(UserPassesTestMixin, generic.View):
+    """
+    Выгрузка комментариев для модераторов, только для персонала.
+
+    Ответ отдаётся по частям, пока идёт чтение из базы, поэтому
+    бюджет запросов и чтение с реплики к нему не применяются.
+    """
+    raise_exception = True
+    http_method_names = ('get',)
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in CONTENT_TYPES:
+            raise BadRequest(INVALID_FORMAT)
+        rows = comment_rows(
+            parse_day(request.GET.get('since')),
+            parse_day(request.GET.get('until')),
+        )
+        response = StreamingHttpResponse(
+            render_chunks(file_format, rows),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="comments.{file_format}"'
+        )
+        return response
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,6 +22,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.profiling.ProfilingMiddleware',
+    'news.replicas.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,13 +54,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
+# Профиль SQLite для нагруженной работы: WAL, прагмы при открытии
+# соединения и постоянные соединения. Включается SQLITE_PERFORMANCE=1.
+SQLITE_PERFORMANCE = os.environ.get('SQLITE_PERFORMANCE') == '1'
+SQLITE_PERFORMANCE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение задаётся в килобайтах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+SQLITE_PRAGMAS = SQLITE_PERFORMANCE_PRAGMAS if SQLITE_PERFORMANCE else {}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'news.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600 if SQLITE_PERFORMANCE else 0,
+        # Файловая тестовая база: в памяти SQLite не даёт писать
+        # из нескольких потоков, а тесты на гонки это делают.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Реплики для чтения: пути к копиям базы через os.pathsep в
+# SQLITE_REPLICAS. Копии поддерживаются снаружи, например litestream.
+# После записи пользователь REPLICA_PIN_SECONDS читает с основной базы
+# и видит свои изменения. Кеш страниц для анонимов заполняется только
+# из основной базы, так что отставание реплик в него не попадает.
+DATABASE_REPLICAS = []
+for index, path in enumerate(
+    filter(None, os.environ.get('SQLITE_REPLICAS', '').split(os.pathsep)),
+    start=1,
+):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['news.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Кеш страниц для анонимных читателей: срок свежести, сколько ещё
+# можно отдавать устаревшую копию и время жизни блокировки пересборки.
+NEWS_CACHE_ALIAS = 'default'
+NEWS_PAGE_CACHE_TIMEOUT = 60
+NEWS_PAGE_CACHE_STALE_TIMEOUT = 300
+NEWS_PAGE_CACHE_LOCK_TIMEOUT = 10
+# Блок комментариев кешируется по версии новости, так что устаревшие
+# записи просто перестают запрашиваться.
+NEWS_COMMENTS_CACHE_TIMEOUT = 60 * 60
+
 
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -80,3 +135,58 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+# Имена адресов news, которые обслуживают асинхронные view под ASGI.
+NEWS_ASYNC_VIEWS = ()
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+NEWS_SEARCH_PAGE_SIZE = 20
+
+# Размер страницы JSON API по умолчанию и наибольший (параметр limit).
+NEWS_API_PAGE_SIZE = 20
+NEWS_API_MAX_PAGE_SIZE = 500
+
+# Отложенная запись комментариев пачками из фонового потока.
+NEWS_COMMENT_WRITE_BEHIND = False
+NEWS_COMMENT_BATCH_SIZE = 50
+NEWS_COMMENT_FLUSH_INTERVAL = 0.2
+
+# Токен-бакеты для записей: (ёмкость, секунд на полное пополнение)
+# на пользователя и на IP. Для нескольких процессов нужен общий кеш
+# и news.throttle.CacheBuckets.
+NEWS_THROTTLE_BACKEND = 'news.throttle.LocalBuckets'
+NEWS_THROTTLE_RATES = {
+    'comment': {'user': (5, 60), 'ip': (30, 60)},
+}
+# Ключ request.META с адресом клиента, если перед приложением стоит
+# обратный прокси: иначе все клиенты делят бакет с адресом прокси.
+# Например 'HTTP_X_FORWARDED_FOR' (берётся последний адрес) или
+# 'HTTP_X_REAL_IP'. None — REMOTE_ADDR. Без прокси заголовок задавать
+# нельзя: его подделает сам клиент.
+NEWS_THROTTLE_IP_HEADER = None
+
+# Файл со списком запрещённых слов, по одному на строку.
+# Если не задан, используется news.forms.BAD_WORDS.
+BAD_WORDS_FILE = None
+BAD_WORDS_MATCHER = 'news.moderation.AhoCorasickMatcher'
+
+# Превышение query_budget у view: исключение вместо записи в лог.
+QUERY_BUDGET_STRICT = DEBUG
+
+# Доля профилируемых запросов от 0 до 1; при 0 middleware отключено.
+PROFILING_SAMPLE_RATE = 0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'news.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -0,0 +1,23 @@
+import pytest
+from django.core.cache import caches
+
+from notes.throttle import reset_buckets
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+    reset_buckets()
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    """Во всех тестах view падают при превышении бюджета запросов."""
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(settings):
+    """Лимиты на запись задают только тесты, которые их проверяют."""
+    settings.NOTES_THROTTLE_RATES = {}
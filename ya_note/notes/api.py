@@ -0,0 +1,84 @@
+"""
+JSON API заметок пользователя, адресуемых по slug.
+
+Для офлайн-копии клиент один раз забирает всё через sync с since=0,
+а дальше передаёт полученный токен и получает только изменения.
+"""
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.http import Http404, JsonResponse
+from django.views import generic
+
+from .replicas import ReplicaReadMixin
+from .sync import get_changes
+from .views import NoteBase
+
+FIELDS = ('slug', 'title', 'text', 'updated')
+INVALID_NUMBER = 'Параметр {name} должен быть неотрицательным числом.'
+
+
+def json_response(data):
+    return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+
+class NoteApiBase(NoteBase, ReplicaReadMixin, generic.View):
+    """Только чтение; без входа — 403, а не переадресация."""
+    raise_exception = True
+    http_method_names = ('get', 'head', 'options')
+
+    def get_number(self, name):
+        value = self.request.GET.get(name, '0')
+        if not value.isdigit():
+            raise BadRequest(INVALID_NUMBER.format(name=name))
+        return int(value)
+
+
+class NotesApi(NoteApiBase):
+    """Заметки по возрастанию id, keyset через ?after=<id>."""
+    query_budget = 3
+
+    def get(self, request, *args, **kwargs):
+        size = settings.NOTES_API_PAGE_SIZE
+        notes = list(self.get_queryset().filter(
+            pk__gt=self.get_number('after')
+        ).order_by('pk').values('pk', *FIELDS)[:size + 1])
+        after = notes[size - 1]['pk'] if len(notes) > size else None
+        return json_response({
+            'results': [
+                {name: note[name] for name in FIELDS}
+                for note in notes[:size]
+            ],
+            'after': after,
+        })
+
+
+class NoteApi(NoteApiBase):
+    query_budget = 3
+
+    def get(self, request, *args, **kwargs):
+        note = self.get_queryset().filter(
+            slug=self.kwargs['slug']
+        ).values(*FIELDS).first()
+        if note is None:
+            raise Http404
+        return json_response(note)
+
+
+class SyncApi(NoteApiBase):
+    """
+    Изменения после токена ?since=.
+
+    Клиент сначала удаляет заметки из deleted, потом сохраняет changed
+    и запоминает token; пока more истинно, запрашивает следующую
+    порцию с новым токеном.
+    """
+    query_budget = 5
+
+    def get(self, request, *args, **kwargs):
+        page = get_changes(
+            request.user.id,
+            self.get_number('since'),
+            settings.NOTES_SYNC_PAGE_SIZE,
+            FIELDS[1:],
+        )
+        return json_response(page._asdict())
@@ -0,0 +1,65 @@
+"""
+Кеш отрендеренных фрагментов страниц с заметками.
+
+У каждого автора своя версия кеша: любое изменение его заметок
+увеличивает версию, и все его фрагменты перестают находиться.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+HITS_KEY = 'notes:stats:hits'
+MISSES_KEY = 'notes:stats:misses'
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def _version_key(author_id):
+    return f'notes:version:{author_id}'
+
+
+def incr(key):
+    """Увеличивает бессрочный счётчик; пропавший считается нулём."""
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ успели вытеснить между add и incr.
+        cache.set(key, 1, timeout=None)
+
+
+def get_version(author_id):
+    cache = get_cache()
+    key = _version_key(author_id)
+    cache.add(key, 1, timeout=None)
+    return cache.get(key, 1)
+
+
+def invalidate(author_id):
+    """Сбрасывает все закешированные фрагменты автора."""
+    incr(_version_key(author_id))
+
+
+def get_fragment(author_id, name, render):
+    """Возвращает фрагмент из кеша, а при промахе рендерит и сохраняет."""
+    cache = get_cache()
+    key = f'notes:{name}:{author_id}:{get_version(author_id)}'
+    fragment = cache.get(key)
+    if fragment is None:
+        incr(MISSES_KEY)
+        fragment = render()
+        cache.set(key, fragment, settings.NOTES_CACHE_TIMEOUT)
+    else:
+        incr(HITS_KEY)
+    return fragment
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша фрагментов."""
+    cache = get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
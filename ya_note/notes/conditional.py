@@ -0,0 +1,43 @@
+"""
+Условные GET-запросы: ETag и Last-Modified без рендеринга страницы.
+
+View описывает валидаторы в get_validators(); если клиент прислал
+совпадающие If-None-Match или If-Modified-Since, он получает 304
+и шаблон не рендерится.
+"""
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    etag = None
+
+    def get_validators(self):
+        """
+        Возвращает пару (etag, last_modified) или (None, None).
+
+        Без валидаторов страница просто отдаётся целиком.
+        """
+        return None, None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        # По нему же различаются закешированные фрагменты страницы.
+        self.etag = etag
+        if etag is not None:
+            etag = quote_etag(etag)
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            if etag is not None:
+                response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
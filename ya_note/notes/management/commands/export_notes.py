@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.models import Note
+from notes.transfer import FORMATS, guess_format, write_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSON Lines или CSV, не загружая их в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или "-" для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--author', help='Только заметки этого автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, path, format=None, author=None, chunk_size=2000,
+               **options):
+        file_format = format or guess_format(path)
+        notes = Note.objects.order_by('id')
+        if author:
+            notes = notes.filter(author__username=author)
+        rows = notes.values_list(
+            'title', 'text', 'slug', 'author__username'
+        ).iterator(chunk_size=chunk_size)
+        started = time.monotonic()
+        counter = CountingIterator(rows)
+        if path == '-':
+            # OutputWrapper.write дописывает перевод строки к каждому
+            # вызову, поэтому строки пишутся в его поток напрямую.
+            write_rows(self.stdout._out, file_format, counter)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                write_rows(stream, file_format, counter)
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            f'Выгружено заметок: {counter.count}, {elapsed:.2f} с '
+            f'({counter.count / (elapsed or 1):.0f} строк/с).'
+        )
+
+
+class CountingIterator:
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.count += 1
+            yield item
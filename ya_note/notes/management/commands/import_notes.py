@@ -0,0 +1,64 @@
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from notes.cache import invalidate
+from notes.models import Note, assign_sequences
+from notes.slugs import create_with_unique_slugs
+from notes.transfer import FORMATS, guess_format, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки из файла JSON Lines или CSV пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, path, format=None, batch_size=1000, **options):
+        file_format = format or guess_format(path)
+        started = time.monotonic()
+        imported = skipped = 0
+        with open(path, encoding='utf-8', newline='') as stream:
+            rows = read_rows(stream, file_format)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                created = self.import_batch(batch)
+                imported += created
+                skipped += len(batch) - created
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Импортировано заметок: {imported}, пропущено: {skipped}, '
+            f'{elapsed:.2f} с ({imported / (elapsed or 1):.0f} строк/с).'
+        )
+
+    def import_batch(self, batch):
+        """Строки с неизвестным автором пропускаются."""
+        usernames = {row['author'] for row in batch}
+        authors = dict(User.objects.filter(
+            username__in=usernames
+        ).values_list('username', 'id'))
+        notes = create_with_unique_slugs((
+            Note(
+                title=row['title'],
+                text=row['text'],
+                slug=row.get('slug') or '',
+                author_id=authors[row['author']],
+            )
+            for row in batch
+            if row['author'] in authors
+        ), self.create_notes)
+        for author_id in {note.author_id for note in notes}:
+            invalidate(author_id)
+        return len(notes)
+
+    def create_notes(self, notes):
+        assign_sequences(notes)
+        Note.objects.bulk_create(notes)
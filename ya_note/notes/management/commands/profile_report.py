@@ -0,0 +1,55 @@
+import json
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    rank = max(round(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def read_records(stream):
+    """Строки лога профилировщика; префикс форматтера пропускается."""
+    for line in stream:
+        start = line.find('{')
+        if start == -1:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if 'total_ms' in record:
+            yield record
+
+
+class Command(BaseCommand):
+    help = 'Сводка p50/p95/p99 времени ответа по именам URL из лога.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл лога или "-" для stdin.')
+
+    def handle(self, path, **options):
+        if path == '-':
+            timings = self.collect(sys.stdin)
+        else:
+            with open(path, encoding='utf-8') as stream:
+                timings = self.collect(stream)
+        header = ('url_name', 'count') + tuple(f'p{p}' for p in PERCENTILES)
+        self.stdout.write('\t'.join(header))
+        for url_name, values in sorted(timings.items()):
+            values.sort()
+            self.stdout.write('\t'.join(
+                [url_name, str(len(values))]
+                + [f'{percentile(values, p):.2f}' for p in PERCENTILES]
+            ))
+
+    def collect(self, stream):
+        timings = defaultdict(list)
+        for record in read_records(stream):
+            timings[record['url_name'] or '-'].append(record['total_ms'])
+        return timings
@@ -0,0 +1,120 @@
+import random
+import tempfile
+import time
+from itertools import accumulate, product
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from notes.search import search_notes
+
+from .profile_report import PERCENTILES, percentile
+
+ALIAS = 'search_benchmark'
+SYLLABLES = ('ка', 'ло', 'ми', 'ра', 'ту', 'не', 'со', 'ви', 'де', 'пу')
+TEXT_WORDS = 30
+BATCH_SIZE = 10_000
+INSERT = (
+    'INSERT INTO notes_note (title, text, slug, author_id, updated) '
+    "VALUES (%s, %s, %s, %s, datetime('now'))"
+)
+
+
+def vocabulary():
+    """
+    Псевдослова из слогов и накопленные веса для random.choices.
+
+    Частоты убывают как 1 / ранг, как у слов естественного языка.
+    """
+    words = [
+        ''.join(parts)
+        for length in (2, 3, 4)
+        for parts in product(SYLLABLES, repeat=length)
+    ]
+    ranks = range(1, len(words) + 1)
+    return words, list(accumulate(1 / rank for rank in ranks))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет временную базу заметками и замеряет время '
+        'полнотекстового поиска по заметкам одного пользователя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, notes, users, queries, seed, **options):
+        generator = random.Random(seed)
+        with tempfile.TemporaryDirectory() as directory:
+            connections.databases[ALIAS] = {
+                **connections.databases['default'],
+                'NAME': str(Path(directory) / 'search.sqlite3'),
+                'TEST': {},
+            }
+            try:
+                call_command('migrate', database=ALIAS, verbosity=0)
+                started = time.perf_counter()
+                author_ids = self.fill(generator, notes, users)
+                self.stdout.write(
+                    f'Заметок: {notes}, пользователей: {users}, '
+                    f'заполнение {time.perf_counter() - started:.1f} с.'
+                )
+                timings = sorted(self.search(generator, author_ids, queries))
+            finally:
+                connections[ALIAS].close()
+                del connections[ALIAS]
+                del connections.databases[ALIAS]
+        self.stdout.write('\t'.join(
+            ['queries'] + [f'p{p}' for p in PERCENTILES]
+        ))
+        self.stdout.write('\t'.join(
+            [str(queries)]
+            + [f'{percentile(timings, p) * 1000:.2f}' for p in PERCENTILES]
+        ))
+
+    def fill(self, generator, notes, users):
+        get_user_model().objects.db_manager(ALIAS).bulk_create(
+            get_user_model()(username=f'user{index}')
+            for index in range(users)
+        )
+        author_ids = list(get_user_model().objects.using(ALIAS).values_list(
+            'id', flat=True
+        ))
+        words, weights = vocabulary()
+        connection = connections[ALIAS]
+        with connection.cursor() as cursor:
+            # Временная база: надёжность записи не нужна.
+            cursor.execute('PRAGMA synchronous = OFF')
+        for start in range(0, notes, BATCH_SIZE):
+            rows = []
+            for index in range(start, min(start + BATCH_SIZE, notes)):
+                text = generator.choices(
+                    words, cum_weights=weights, k=TEXT_WORDS
+                )
+                rows.append((
+                    ' '.join(text[:3]),
+                    ' '.join(text),
+                    f'note-{index}',
+                    generator.choice(author_ids),
+                ))
+            with transaction.atomic(using=ALIAS):
+                with connection.cursor() as cursor:
+                    cursor.executemany(INSERT, rows)
+        return author_ids
+
+    def search(self, generator, author_ids, queries):
+        words, weights = vocabulary()
+        for _ in range(queries):
+            query = ' '.join(
+                generator.choices(words, cum_weights=weights, k=2)
+            )
+            started = time.perf_counter()
+            search_notes(generator.choice(author_ids), query, using=ALIAS)
+            yield time.perf_counter() - started
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# Внешнее содержимое берётся из представления: в нём автор заметки
+# записан словом owner, чтобы поиск по заметкам одного пользователя
+# отбирался самим индексом FTS5. Индекс обновляют триггеры.
+# Индексы префиксов: поиск ищет каждое слово как префикс, а без них
+# короткий префикс пришлось бы собирать из тысяч слов.
+# Эти объекты Django не отслеживает. Операции, после которых SQLite
+# пересоздаёт notes_note (AddField, AlterField и т. п.), молча удалят
+# триггеры и представление: в последующих миграциях таблицы нужен
+# сырой ALTER TABLE, как в 0006_note_sync.
+CREATE = (
+    """
+    CREATE VIEW notes_note_fts_source AS
+    SELECT id, title, text, 'u' || author_id AS owner FROM notes_note
+    """,
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, text, owner,
+        content='notes_note_fts_source', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_insert AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts (rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_delete AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts (notes_note_fts, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_update
+    AFTER UPDATE OF title, text, author_id ON notes_note BEGIN
+        INSERT INTO notes_note_fts (notes_note_fts, rowid, title, text, owner)
+        VALUES ('delete', old.id, old.title, old.text, 'u' || old.author_id);
+        INSERT INTO notes_note_fts (rowid, title, text, owner)
+        VALUES (new.id, new.title, new.text, 'u' || new.author_id);
+    END
+    """,
+    "INSERT INTO notes_note_fts (notes_note_fts) VALUES ('rebuild')",
+)
+DROP = (
+    'DROP TRIGGER notes_note_fts_update',
+    'DROP TRIGGER notes_note_fts_delete',
+    'DROP TRIGGER notes_note_fts_insert',
+    'DROP TABLE notes_note_fts',
+    'DROP VIEW notes_note_fts_source',
+)
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE), run_on_sqlite(DROP)),
+    ]
@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+import django.db.models.deletion
+
+# AddField в SQLite пересоздаёт таблицу, а вместе с ней пропали бы
+# представление и триггеры полнотекстового индекса. ADD COLUMN их не
+# трогает и не копирует таблицу.
+ADD_COLUMN = (
+    'ALTER TABLE notes_note ADD COLUMN "sequence" bigint unsigned '
+    'NOT NULL DEFAULT 0 CHECK ("sequence" >= 0)'
+)
+DROP_COLUMN = 'ALTER TABLE notes_note DROP COLUMN "sequence"'
+
+
+def add_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(ADD_COLUMN)
+        return
+    Note = apps.get_model('notes', 'Note')
+    schema_editor.add_field(Note, Note._meta.get_field('sequence'))
+
+
+def remove_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_COLUMN)
+        return
+    Note = apps.get_model('notes', 'Note')
+    schema_editor.remove_field(Note, Note._meta.get_field('sequence'))
+
+
+def number_changes(apps, schema_editor):
+    """Номера растут вместе с id, счётчик автора — его наибольший id."""
+    Note = apps.get_model('notes', 'Note')
+    SyncCounter = apps.get_model('notes', 'SyncCounter')
+    Note.objects.update(sequence=F('id'))
+    SyncCounter.objects.bulk_create(
+        SyncCounter(author_id=row['author'], value=row['last'])
+        for row in Note.objects.values('author').annotate(last=Max('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0005_note_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCounter',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(db_index=False, max_length=100)),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_sequence, remove_sequence),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='note',
+                    name='sequence',
+                    field=models.PositiveBigIntegerField(default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'sequence'], name='note_author_sequence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['author', 'sequence'], name='tombstone_author_sequence_idx'),
+        ),
+        migrations.RunPython(number_changes, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
+from collections import defaultdict
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 
-from pytils.translit import slugify
+from .slugs import save_with_unique_slug
 
 
 class Note(models.Model):
@@ -23,16 +26,112 @@ class Note(models.Model):
         help_text=('Укажите адрес для страницы заметки. Используйте только '
                    'латиницу, цифры, дефисы и знаки подчёркивания')
     )
+    # Индекс по автору заменяет составной (author, id) из Meta.
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
+    updated = models.DateTimeField(auto_now=True)
+    # Номер последнего изменения в заметках автора, см. reserve_sequences.
+    sequence = models.PositiveBigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+            models.Index(
+                fields=('author', 'updated'), name='note_author_updated_idx'
+            ),
+            models.Index(
+                fields=('author', 'sequence'),
+                name='note_author_sequence_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        note = super().from_db(db, field_names, values)
+        # Slug из базы: если его сменят, клиентам нужно надгробие.
+        note._stored_slug = note.__dict__.get('slug')
+        return note
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            self.sequence = reserve_sequences(self.author_id)
+            if self.slug:
+                super().save(*args, **kwargs)
+            else:
+                save_with_unique_slug(
+                    self, lambda: super(Note, self).save(*args, **kwargs)
+                )
+            stored_slug = getattr(self, '_stored_slug', None)
+            if stored_slug and stored_slug != self.slug:
+                bury(self.author_id, stored_slug)
+        self._stored_slug = self.slug
+
+
+class Tombstone(models.Model):
+    """Slug удалённой или переименованной заметки для синхронизации."""
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    slug = models.SlugField(max_length=100, db_index=False)
+    sequence = models.PositiveBigIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'sequence'),
+                name='tombstone_author_sequence_idx',
+            ),
+        )
+
+
+class SyncCounter(models.Model):
+    """Последний номер изменения в заметках автора."""
+    author = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    value = models.PositiveBigIntegerField(default=0)
+
+
+def reserve_sequences(author_id, count=1):
+    """
+    Резервирует count номеров изменений автора и возвращает последний.
+
+    Вызывается в транзакции вместе с самой записью. Транзакции SQLite
+    начинаются с BEGIN IMMEDIATE, так что номера выдаются в порядке
+    коммитов, и клиент с токеном N не пропустит изменение с меньшим
+    номером, закоммиченное позже. Счётчик не уменьшается и при
+    удалении заметок в обход NoteDelete.
+    """
+    counters = SyncCounter.objects.filter(author_id=author_id)
+    if not counters.update(value=F('value') + count):
+        SyncCounter.objects.create(author_id=author_id, value=count)
+        return count
+    return counters.values_list('value', flat=True).get()
+
+
+def assign_sequences(notes):
+    """Номера изменений для пачки новых заметок перед bulk_create."""
+    by_author = defaultdict(list)
+    for note in notes:
+        by_author[note.author_id].append(note)
+    for author_id, own in by_author.items():
+        first = reserve_sequences(author_id, len(own)) - len(own) + 1
+        for sequence, note in enumerate(own, first):
+            note.sequence = sequence
+
+
+def bury(author_id, slug):
+    """Оставляет надгробие: клиенты уберут заметку с этим slug."""
+    Tombstone.objects.create(
+        author_id=author_id, slug=slug, sequence=reserve_sequences(author_id)
+    )
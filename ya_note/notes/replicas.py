@@ -0,0 +1,130 @@
+"""
+Чтение с реплик базы данных.
+
+GET-запросы к view с ReplicaReadMixin читают с одной из реплик
+DATABASE_REPLICAS, все записи идут в основную базу. Ответ на запрос,
+который что-то записал, ставит cookie: пока она жива, REPLICA_PIN_SECONDS,
+пользователь читает только с основной базы и видит свои изменения,
+даже если реплика от неё отстаёт.
+"""
+import asyncio
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .profiling import render_response
+
+PIN_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_replica = ContextVar('replica', default=None)
+# Флаг записи текущего запроса. Изменяемый список, а не само значение:
+# под ASGI view работает в потоке с копией контекста, и новое значение
+# переменной в middleware не вернулось бы.
+_wrote = ContextVar('wrote_to_primary', default=None)
+
+
+@contextmanager
+def _read_from(alias):
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def read_from_replica():
+    """
+    Чтения внутри блока идут на одну случайную реплику.
+
+    Одна на весь блок: данные и валидаторы страницы согласованы между
+    собой, даже если реплики отстают по-разному.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    return _read_from(random.choice(replicas) if replicas else None)
+
+
+def read_from_primary():
+    """Чтения внутри блока идут в основную базу, даже во view с репликой."""
+    return _read_from(None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _replica.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote[0] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+
+class ReplicaPinMiddleware:
+    """
+    Закрепляет за основной базой пользователя, который только что писал.
+
+    Работает и под WSGI, и под ASGI: синхронная middleware в начале
+    списка заставила бы Django выполнять всю цепочку в одном потоке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django видит, что middleware можно ждать как корутину.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        wrote = [False]
+        token = _wrote.set(wrote)
+        try:
+            response = self.get_response(request)
+        finally:
+            _wrote.reset(token)
+        return self.pin(response, wrote[0])
+
+    async def __acall__(self, request):
+        wrote = [False]
+        token = _wrote.set(wrote)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _wrote.reset(token)
+        return self.pin(response, wrote[0])
+
+    def pin(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class ReplicaReadMixin:
+    """View только читает, и её GET-запросы можно отдать реплике."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            # Запросы из шаблона тоже должны уйти на реплику.
+            if not getattr(response, 'is_rendered', True):
+                render_response(request, response)
+        return response
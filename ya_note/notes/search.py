@@ -0,0 +1,94 @@
+"""
+Полнотекстовый поиск по заметкам пользователя.
+
+В SQLite запрос идёт в таблицу FTS5 notes_note_fts, где у каждой
+заметки есть слово владельца, так что чужие заметки отсекает сам
+индекс. Результаты упорядочены по bm25 с большим весом заголовка,
+в отрывке текста выделены найденные слова. На других базах
+используется icontains без ранжирования.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Note
+
+WORD = re.compile(r'\w+')
+# Метки выделения не встречаются в тексте и переживают escape().
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_WORDS = 16
+TITLE_WEIGHT = 10.0
+
+SearchPage = namedtuple('SearchPage', ('results', 'has_next'))
+
+FTS_SEARCH = f"""
+    SELECT notes_note.*, snippet(
+        notes_note_fts, 1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_WORDS}
+    ) AS snippet
+    FROM notes_note_fts
+    JOIN notes_note ON notes_note.id = notes_note_fts.rowid
+    WHERE notes_note_fts MATCH %s
+    ORDER BY bm25(notes_note_fts, {TITLE_WEIGHT}, 1.0, 0.0)
+    LIMIT %s OFFSET %s
+"""
+
+
+def fts_query(author_id, query):
+    """
+    Запрос FTS5 из пользовательского ввода.
+
+    Каждое слово берётся в кавычки, чтобы операторы FTS5 в вводе не
+    ломали синтаксис, и ищется как префикс в заголовке и тексте.
+    """
+    words = ' '.join(f'"{word}"*' for word in WORD.findall(query.lower()))
+    return f'owner:u{author_id} AND {{title text}}: ({words})'
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def _fts_search(manager, query, limit, offset):
+    results = list(manager.raw(FTS_SEARCH, (query, limit, offset)))
+    for note in results:
+        note.snippet = highlight(note.snippet)
+    return results
+
+
+def _fallback_search(manager, author_id, words, limit, offset):
+    condition = Q(author_id=author_id)
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    results = list(manager.filter(condition)[offset:offset + limit])
+    for note in results:
+        note.snippet = Truncator(note.text).words(SNIPPET_WORDS)
+    return results
+
+
+def search_notes(author_id, query, page=1, page_size=20, using=None):
+    """Страница результатов поиска; COUNT по индексу не выполняется."""
+    words = WORD.findall(query)
+    if not words:
+        return SearchPage([], False)
+    using = using or router.db_for_read(Note)
+    manager = Note.objects.db_manager(using)
+    offset = (page - 1) * page_size
+    # Лишняя запись показывает, есть ли следующая страница.
+    if connections[using].vendor == 'sqlite':
+        results = _fts_search(
+            manager, fts_query(author_id, query), page_size + 1, offset
+        )
+    else:
+        results = _fallback_search(
+            manager, author_id, words, page_size + 1, offset
+        )
+    return SearchPage(results[:page_size], len(results) > page_size)
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .models import Note, bury
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_author_cache(sender, instance, **kwargs):
+    """
+    Сбрасывает кеш автора сразу и ещё раз после коммита.
+
+    Повторный сброс не даёт закрепиться фрагменту, который успели
+    отрендерить по старым данным до завершения транзакции.
+    """
+    author_id = instance.author_id
+    invalidate(author_id)
+    transaction.on_commit(lambda: invalidate(author_id))
+
+
+@receiver(pre_delete, sender=Note)
+def bury_note(sender, instance, **kwargs):
+    """
+    Надгробие для любого удаления: delete(), QuerySet.delete(), админка.
+
+    pre_delete, а не post_delete: при удалении автора сигналы заметок
+    приходят до каскадного удаления его надгробий и счётчика, и записи,
+    сделанные здесь, удалятся вместе с ними.
+    """
+    bury(instance.author_id, instance.slug)
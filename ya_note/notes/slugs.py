@@ -0,0 +1,126 @@
+"""
+Выделение уникальных slug для заметок.
+
+Уникальность обеспечивает ограничение в базе: slug из заголовка
+сохраняется сразу, а при конфликте к нему добавляется случайный суффикс.
+"""
+import secrets
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+from pytils.translit import slugify
+
+SUFFIX_BYTES = 3
+MAX_ATTEMPTS = 10
+# Ограничение SQLite на число параметров в запросе.
+LOOKUP_BATCH_SIZE = 500
+
+
+@lru_cache(maxsize=4096)
+def title_to_slug(title, max_length):
+    """Транслитерация одного и того же заголовка выполняется один раз."""
+    return slugify(title)[:max_length]
+
+
+def _with_suffix(slug, max_length):
+    suffix = secrets.token_hex(SUFFIX_BYTES)
+    if not slug:
+        return suffix
+    return f'{slug[:max_length - len(suffix) - 1]}-{suffix}'
+
+
+def _slug_max_length(model):
+    return model._meta.get_field('slug').max_length
+
+
+def save_with_unique_slug(note, save):
+    """
+    Сохраняет заметку со slug из заголовка.
+
+    Каждая попытка идёт в своей точке сохранения, так что конфликт
+    не ломает внешнюю транзакцию.
+    """
+    model = type(note)
+    max_length = _slug_max_length(model)
+    base = title_to_slug(note.title, max_length)
+    note.slug = base
+    for _ in range(MAX_ATTEMPTS - 1):
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            if not model._default_manager.filter(slug=note.slug).exists():
+                raise
+        note.slug = _with_suffix(base, max_length)
+    return save()
+
+
+def allocate_slugs(notes):
+    """
+    Подбирает свободные slug для пачки заметок перед bulk_create.
+
+    Основой служит заданный slug или slug из заголовка. Занятые
+    проверяются одним запросом на пачку кандидатов, а повторы и
+    конфликты получают суффикс.
+    """
+    notes = list(notes)
+    if not notes:
+        return notes
+    model = type(notes[0])
+    manager = model._default_manager
+    max_length = _slug_max_length(model)
+    bases = {}
+    for note in notes:
+        note.slug = note.slug or title_to_slug(note.title, max_length)
+        bases[id(note)] = note.slug
+    taken = set()
+    pending = notes
+    while pending:
+        candidates = list({note.slug for note in pending} - taken)
+        for start in range(0, len(candidates), LOOKUP_BATCH_SIZE):
+            taken.update(manager.filter(
+                slug__in=candidates[start:start + LOOKUP_BATCH_SIZE]
+            ).values_list('slug', flat=True))
+        conflicted = []
+        for note in pending:
+            if note.slug in taken:
+                note.slug = _with_suffix(bases[id(note)], max_length)
+                conflicted.append(note)
+            else:
+                taken.add(note.slug)
+        pending = conflicted
+    return notes
+
+
+def create_with_unique_slugs(notes, create):
+    """
+    Подбирает slug и создаёт пачку заметок в одной транзакции.
+
+    Если заметку с тем же slug создали параллельно после проверки,
+    create() падает с IntegrityError: пачка откатывается, и slug
+    подбираются заново от исходных. Другие ошибки целостности
+    пробрасываются сразу.
+    """
+    notes = list(notes)
+    if not notes:
+        return notes
+    manager = type(notes[0])._default_manager
+    requested = [note.slug for note in notes]
+    for attempt in range(MAX_ATTEMPTS):
+        for note, slug in zip(notes, requested):
+            note.slug = slug
+        try:
+            with transaction.atomic():
+                allocate_slugs(notes)
+                create(notes)
+            return notes
+        except IntegrityError:
+            slugs = [note.slug for note in notes]
+            conflict = any(
+                manager.filter(
+                    slug__in=slugs[start:start + LOOKUP_BATCH_SIZE]
+                ).exists()
+                for start in range(0, len(slugs), LOOKUP_BATCH_SIZE)
+            )
+            if not conflict or attempt == MAX_ATTEMPTS - 1:
+                raise
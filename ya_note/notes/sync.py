@@ -0,0 +1,63 @@
+"""
+Синхронизация заметок с клиентом по токену.
+
+Каждое изменение заметок автора получает следующий номер из его
+счётчика (reserve_sequences): номер пишется в саму заметку, а при
+удалении или смене slug — в надгробие со старым slug. Токен клиента
+— последний номер, который он видел, поэтому ответ пропорционален
+числу изменений, а не числу заметок.
+"""
+from collections import namedtuple
+
+from .models import Note, SyncCounter, Tombstone
+
+SyncPage = namedtuple('SyncPage', ('changed', 'deleted', 'token', 'more'))
+
+
+def get_changes(author_id, since, limit, fields):
+    """
+    Изменения после токена since, не больше limit.
+
+    Заметки и надгробия читаются по индексам (author, sequence) двумя
+    запросами, и между ними может закоммититься чужая запись. Поэтому
+    сначала читается счётчик автора, и берутся только номера не больше
+    него: все они уже закоммичены, а изменённая или удалённая потом
+    заметка получит номер больше и придёт в следующий раз. Slug,
+    который снова занят изменённой заметкой, в deleted не попадает:
+    надгробие всегда старше.
+    """
+    last = SyncCounter.objects.filter(
+        author_id=author_id
+    ).values_list('value', flat=True).first() or 0
+    window = {
+        'author_id': author_id,
+        'sequence__gt': since,
+        'sequence__lte': last,
+    }
+    notes = Note.objects.filter(**window).order_by('sequence').values(
+        'sequence', 'slug', *fields
+    )[:limit + 1]
+    tombstones = Tombstone.objects.filter(**window).order_by(
+        'sequence'
+    ).values_list('sequence', 'slug')[:limit + 1]
+    changes = sorted(
+        [(note['sequence'], note) for note in notes]
+        + [(sequence, slug) for sequence, slug in tombstones],
+        key=lambda change: change[0],
+    )
+    page = changes[:limit]
+    changed = [change for _, change in page if isinstance(change, dict)]
+    slugs = {note['slug'] for note in changed}
+    deleted = [
+        slug for _, slug in page
+        if isinstance(slug, str) and slug not in slugs
+    ]
+    return SyncPage(
+        changed=[
+            {name: note[name] for name in ('slug', *fields)}
+            for note in changed
+        ],
+        deleted=deleted,
+        token=page[-1][0] if page else since,
+        more=len(changes) > limit,
+    )
@@ -0,0 +1,237 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from notes.models import Note, Tombstone
+from notes.sync import get_changes
+
+User = get_user_model()
+
+LIST_URL = reverse('notes:api_list')
+SYNC_URL = reverse('notes:api_sync')
+NOTES_COUNT = 300
+
+
+def sync(client, local, token):
+    """Применяет изменения к локальной копии, как это делал бы клиент."""
+    while True:
+        page = client.get(SYNC_URL, {'since': token}).json()
+        for slug in page['deleted']:
+            local.pop(slug, None)
+        for note in page['changed']:
+            local[note['slug']] = note['title']
+        token = page['token']
+        if not page['more']:
+            return token
+
+
+def server_copy(author):
+    return dict(
+        Note.objects.filter(author=author).values_list('slug', 'title')
+    )
+
+
+class TestNotesApi(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.reader = User.objects.create(username='Читатель простой')
+        for index in range(NOTES_COUNT):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст',
+                slug=f'note-{index}', author=cls.author,
+            )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='foreign', author=cls.reader
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_anonymous_gets_forbidden(self):
+        for url in (LIST_URL, SYNC_URL):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(NOTES_API_PAGE_SIZE=120)
+    def test_list_pages_by_id(self):
+        slugs = []
+        after = 0
+        while after is not None:
+            page = self.author_client.get(LIST_URL, {'after': after}).json()
+            slugs += [note['slug'] for note in page['results']]
+            after = page['after']
+        self.assertEqual(slugs, [f'note-{i}' for i in range(NOTES_COUNT)])
+
+    def test_detail_by_slug_of_own_notes_only(self):
+        response = self.author_client.get(
+            reverse('notes:api_detail', args=('note-7',))
+        )
+        self.assertEqual(response.json()['title'], 'Заметка 7')
+        response = self.author_client.get(
+            reverse('notes:api_detail', args=('foreign',))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_invalid_token(self):
+        response = self.author_client.get(SYNC_URL, {'since': '-1'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    @override_settings(NOTES_SYNC_PAGE_SIZE=70)
+    def test_full_sync_then_delta(self):
+        local = {}
+        token = sync(self.author_client, local, 0)
+        self.assertEqual(local, server_copy(self.author))
+        self.author_client.post(
+            reverse('notes:edit', args=('note-1',)),
+            {'title': 'Новое', 'text': 'Текст', 'slug': 'note-1'},
+        )
+        self.author_client.post(reverse('notes:delete', args=('note-2',)))
+        page = self.author_client.get(SYNC_URL, {'since': token}).json()
+        # Объём ответа зависит от числа изменений, а не заметок.
+        self.assertEqual(
+            [note['slug'] for note in page['changed']], ['note-1']
+        )
+        self.assertEqual(page['deleted'], ['note-2'])
+        sync(self.author_client, local, token)
+        self.assertEqual(local, server_copy(self.author))
+
+    def test_renamed_slug_is_deleted_and_reused(self):
+        token = get_changes(self.author.id, 0, NOTES_COUNT, ()).token
+        note = Note.objects.get(slug='note-3')
+        note.slug = 'renamed'
+        note.save()
+        Note.objects.create(
+            title='Новая', text='Текст', slug='note-3', author=self.author
+        )
+        page = get_changes(self.author.id, token, NOTES_COUNT, ('title',))
+        self.assertEqual(
+            {note['slug'] for note in page.changed}, {'renamed', 'note-3'}
+        )
+        # Slug снова занят: надгробие клиенту уже не нужно.
+        self.assertEqual(page.deleted, [])
+
+    def test_sync_within_budget(self):
+        token = get_changes(self.author.id, 0, NOTES_COUNT, ()).token
+        with self.assertNumQueries(5):
+            self.author_client.get(SYNC_URL, {'since': token})
+
+
+class TestTombstones(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        for index in range(3):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст',
+                slug=f'note-{index}', author=cls.author,
+            )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.token = sync(self.author_client, {}, 0)
+
+    def deleted_since_token(self):
+        return self.author_client.get(
+            SYNC_URL, {'since': self.token}
+        ).json()['deleted']
+
+    def test_queryset_delete_leaves_tombstones(self):
+        Note.objects.filter(slug__in=('note-0', 'note-1')).delete()
+        self.assertEqual(self.deleted_since_token(), ['note-0', 'note-1'])
+
+    def test_admin_bulk_delete_leaves_tombstones(self):
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        response = admin_client.post(
+            reverse('admin:notes_note_changelist'), {
+                'action': 'delete_selected',
+                '_selected_action': list(
+                    Note.objects.values_list('pk', flat=True)
+                ),
+                'post': 'yes',
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(Note.objects.exists())
+        self.assertEqual(
+            sorted(self.deleted_since_token()),
+            ['note-0', 'note-1', 'note-2'],
+        )
+
+    def test_deleting_author_removes_tombstones_too(self):
+        self.author.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class TestConcurrentSync(TransactionTestCase):
+    WRITERS = 4
+    EDITS = 25
+
+    def setUp(self):
+        self.author = User.objects.create(username='Соавтор')
+        for index in range(20):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст',
+                slug=f'note-{index}', author=self.author,
+            )
+        self.done = threading.Event()
+
+    def edit(self, writer):
+        """Правит, создаёт и удаляет заметки вперемешку с другими."""
+        generator = random.Random(writer)
+        try:
+            for index in range(self.EDITS):
+                notes = list(Note.objects.filter(author=self.author))
+                note = generator.choice(notes)
+                action = generator.random()
+                if action < 0.2 and len(notes) > 1:
+                    note.delete()
+                elif action < 0.4:
+                    Note.objects.create(
+                        title=f'Новая {writer}-{index}', text='Текст',
+                        author=self.author,
+                    )
+                else:
+                    note.title = f'Правка {writer}-{index}'
+                    note.save()
+        finally:
+            connection.close()
+
+    def follow(self):
+        """Клиент синхронизируется, пока идут правки."""
+        client = Client()
+        client.force_login(self.author)
+        local = {}
+        token = 0
+        try:
+            while not self.done.is_set():
+                token = sync(client, local, token)
+            return local, sync(client, local, token)
+        finally:
+            connection.close()
+
+    def test_client_converges_under_concurrent_edits(self):
+        with ThreadPoolExecutor(self.WRITERS + 1) as executor:
+            follower = executor.submit(self.follow)
+            list(executor.map(self.edit, range(self.WRITERS)))
+            self.done.set()
+            local, _ = follower.result()
+        self.assertEqual(local, server_copy(self.author))
+        sequences = list(
+            Note.objects.values_list('sequence', flat=True)
+        ) + list(Tombstone.objects.values_list('sequence', flat=True))
+        self.assertEqual(len(sequences), len(set(sequences)))
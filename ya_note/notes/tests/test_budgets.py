@@ -0,0 +1,97 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.budget import QueryBudgetExceeded
+from notes.models import Note
+from notes.views import NotesList
+
+User = get_user_model()
+
+NOTES_COUNT = 500
+SLUG = 'note-0'
+HOME_URL = reverse('notes:home')
+LIST_URL = reverse('notes:list')
+SUCCESS_URL = reverse('notes:success')
+ADD_URL = reverse('notes:add')
+DETAIL_URL = reverse('notes:detail', args=(SLUG,))
+EDIT_URL = reverse('notes:edit', args=(SLUG,))
+DELETE_URL = reverse('notes:delete', args=(SLUG,))
+
+
+class TestQueryBudgets(TestCase):
+    """Строгий режим включён в conftest: превышение бюджета упадёт."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст',
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(NOTES_COUNT)
+        )
+        cls.form_data = {'title': 'Заголовок', 'text': 'Текст'}
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def read(self):
+        for url in (
+            HOME_URL, LIST_URL, SUCCESS_URL, ADD_URL,
+            DETAIL_URL, EDIT_URL, DELETE_URL,
+        ):
+            with self.subTest(url=url):
+                response = self.author_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def write(self):
+        post = self.author_client.post
+        responses = (
+            post(ADD_URL, data=self.form_data),
+            # Второй раз тот же заголовок: slug получит суффикс.
+            post(ADD_URL, data=self.form_data),
+            post(EDIT_URL, data={**self.form_data, 'slug': SLUG}),
+            post(DELETE_URL),
+        )
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [HTTPStatus.FOUND] * len(responses),
+        )
+
+    def test_read_views_within_budget(self):
+        self.read()
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_read_views_log_no_warnings(self):
+        with self.assertNoLogs('notes.budget', 'WARNING'):
+            self.read()
+
+    def test_write_views_within_budget(self):
+        self.write()
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_write_views_log_no_warnings(self):
+        with self.assertNoLogs('notes.budget', 'WARNING'):
+            self.write()
+
+    def test_exceeded_budget_raises_in_strict_mode(self):
+        with mock.patch.object(NotesList, 'query_budget', 0):
+            with self.assertRaisesRegex(QueryBudgetExceeded, 'notes_note'):
+                self.author_client.get(LIST_URL)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_exceeded_budget_is_logged(self):
+        with mock.patch.object(NotesList, 'query_budget', 0):
+            with self.assertLogs('notes.budget', 'WARNING') as logs:
+                self.author_client.get(LIST_URL)
+        self.assertIn(
+            'NotesList: 4 SQL-запросов при бюджете 0', logs.output[0]
+        )
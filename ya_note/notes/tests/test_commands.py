@@ -0,0 +1,114 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from notes import slugs
+from notes.models import Note
+from notes.sync import get_changes
+
+User = get_user_model()
+
+NOTES_COUNT = 25
+BATCH_SIZE = 10
+
+
+class TestImportExport(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text=f'Текст {index}',
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(NOTES_COUNT)
+        )
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def export_and_reimport(self, file_name):
+        path = Path(self.tmp_dir.name) / file_name
+        call_command('export_notes', str(path), stderr=StringIO())
+        exported = list(Note.objects.values_list('title', 'text', 'slug'))
+        Note.objects.all().delete()
+        out = StringIO()
+        call_command(
+            'import_notes', str(path), batch_size=BATCH_SIZE, stdout=out
+        )
+        self.assertIn(f'Импортировано заметок: {NOTES_COUNT}', out.getvalue())
+        return path, exported
+
+    def test_roundtrip(self):
+        for file_name in ('notes.jsonl', 'notes.csv'):
+            with self.subTest(file_name=file_name):
+                _, exported = self.export_and_reimport(file_name)
+                self.assertEqual(
+                    list(Note.objects.values_list('title', 'text', 'slug')),
+                    exported,
+                )
+                self.assertEqual(
+                    Note.objects.filter(author=self.author).count(),
+                    NOTES_COUNT,
+                )
+
+    def test_import_resolves_slug_collisions(self):
+        path = Path(self.tmp_dir.name) / 'notes.jsonl'
+        call_command('export_notes', str(path), stderr=StringIO())
+        call_command('import_notes', str(path), stdout=StringIO())
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), NOTES_COUNT * 2)
+        self.assertEqual(len(set(slugs)), NOTES_COUNT * 2)
+
+    def test_import_retries_slug_taken_concurrently(self):
+        path = Path(self.tmp_dir.name) / 'notes.jsonl'
+        path.write_text(json.dumps({
+            'title': 'Новая', 'text': 'Текст', 'slug': 'note-1',
+            'author': self.author.username,
+        }), encoding='utf-8')
+        # Первая проверка не видит заметку, созданную сразу после неё.
+        allocations = [lambda notes: notes, slugs.allocate_slugs]
+        with mock.patch.object(
+            slugs, 'allocate_slugs', lambda notes: allocations.pop(0)(notes)
+        ):
+            call_command('import_notes', str(path), stdout=StringIO())
+        note = Note.objects.get(title='Новая')
+        self.assertTrue(note.slug.startswith('note-1-'))
+        self.assertEqual(Note.objects.count(), NOTES_COUNT + 1)
+
+    def test_imported_notes_reach_sync(self):
+        path = Path(self.tmp_dir.name) / 'notes.jsonl'
+        call_command('export_notes', str(path), stderr=StringIO())
+        call_command(
+            'import_notes', str(path), batch_size=BATCH_SIZE, stdout=StringIO()
+        )
+        # Заметки из setUpTestData созданы без номеров изменений.
+        changes = get_changes(self.author.id, 0, NOTES_COUNT * 2, ())
+        self.assertEqual(len(changes.changed), NOTES_COUNT)
+        self.assertFalse(changes.more)
+
+    def test_import_skips_unknown_authors(self):
+        path = Path(self.tmp_dir.name) / 'notes.jsonl'
+        path.write_text(json.dumps({
+            'title': 'Чужая', 'text': 'Текст', 'slug': '', 'author': 'Никто',
+        }), encoding='utf-8')
+        out = StringIO()
+        call_command('import_notes', str(path), stdout=out)
+        self.assertIn('пропущено: 1', out.getvalue())
+        self.assertEqual(Note.objects.count(), NOTES_COUNT)
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_notes', '-', stdout=out, stderr=StringIO())
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), NOTES_COUNT)
+        self.assertEqual(records[0]['author'], self.author.username)
@@ -1,8 +1,12 @@
-from django.test import TestCase, Client
+from http import HTTPStatus
+
+from django.test import RequestFactory, TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from notes.cache import get_stats
 from notes.models import Note
+from notes.views import CachedFragmentMixin
 from notes.forms import NoteForm
 
 User = get_user_model()
@@ -11,6 +15,7 @@ SLUG = 'note-slug'
 LIST_URL = reverse('notes:list')
 ADD_URL = reverse('notes:add')
 EDIT_URL = reverse('notes:edit', args=[SLUG])
+DETAIL_URL = reverse('notes:detail', args=[SLUG])
 
 
 class TestContent(TestCase):
@@ -45,3 +50,144 @@ class TestContent(TestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertEqual(type(response.context['form']), NoteForm)
+
+
+@override_settings(NOTES_COUNT_ON_PAGE=3)
+class TestNotesPagination(TestCase):
+    NOTES_COUNT = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Очень длинный текст. ' * 1000,
+                slug=f'note-{index}',
+                author=cls.author,
+            )
+            for index in range(cls.NOTES_COUNT)
+        )
+
+    def test_list_is_paginated_and_lean(self):
+        response = self.author_client.get(LIST_URL)
+        object_list = response.context['object_list']
+        self.assertEqual(len(object_list), 3)
+        for note in object_list:
+            self.assertIn('text', note.get_deferred_fields())
+        self.assertTrue(response.context['is_paginated'])
+
+    def test_keyset_pages_cover_all_notes(self):
+        seen = []
+        response = self.author_client.get(LIST_URL, {'after': 0})
+        while True:
+            seen += [note.id for note in response.context['object_list']]
+            next_after = response.context['view'].next_after
+            if next_after is None:
+                break
+            response = self.author_client.get(LIST_URL, {'after': next_after})
+        all_ids = Note.objects.order_by('id').values_list('id', flat=True)
+        self.assertEqual(seen, list(all_ids))
+
+    def test_invalid_after(self):
+        response = self.author_client.get(LIST_URL, {'after': 'abc'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class TestFragmentCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.note = Note.objects.create(
+            title='Заголовок',
+            text='Текст заметки',
+            slug=SLUG,
+            author=cls.author,
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_list_served_from_cache(self):
+        self.author_client.get(LIST_URL)
+        # Сессия, пользователь и COUNT пагинатора, но не сами заметки.
+        with self.assertNumQueries(3):
+            response = self.author_client.get(LIST_URL)
+        self.assertContains(response, self.note.title)
+        self.assertEqual(get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_edit_invalidates_list_and_detail(self):
+        for url in (LIST_URL, DETAIL_URL):
+            self.author_client.get(url)
+        self.author_client.post(EDIT_URL, data={
+            'title': 'Новый заголовок', 'text': 'Новый текст', 'slug': SLUG,
+        })
+        for url, text in (
+            (LIST_URL, 'Новый заголовок'), (DETAIL_URL, 'Новый текст')
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.author_client.get(url), text)
+
+    def test_default_fragment_name_is_full_path(self):
+        view = CachedFragmentMixin()
+        view.request = RequestFactory().get(LIST_URL, {'page': 2})
+        self.assertEqual(view.get_fragment_name({}), f'{LIST_URL}?page=2')
+
+    def test_cache_is_per_author(self):
+        self.author_client.get(LIST_URL)
+        reader_client = Client()
+        reader_client.force_login(User.objects.create(username='Чтец'))
+        response = reader_client.get(LIST_URL)
+        self.assertNotContains(response, self.note.title)
+
+
+class TestConditionalGet(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Заголовок',
+            text='Текст заметки',
+            slug=SLUG,
+            author=cls.author,
+        )
+
+    def test_not_modified(self):
+        for url in (LIST_URL, DETAIL_URL):
+            with self.subTest(url=url):
+                etag = self.author_client.get(url)['ETag']
+                # Сессия, пользователь и один запрос за валидаторами.
+                with self.assertNumQueries(3):
+                    response = self.author_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_etag_changes_after_edit(self):
+        for url in (LIST_URL, DETAIL_URL):
+            with self.subTest(url=url):
+                etag = self.author_client.get(url)['ETag']
+                self.note.text = f'{self.note.text} {url}'
+                self.note.save()
+                response = self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_after_delete(self):
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        response = self.author_client.get(LIST_URL)
+        # Удаление не двигает время последней правки вперёд.
+        self.assertFalse(response.has_header('Last-Modified'))
+        etag = response['ETag']
+        other.delete()
+        response = self.author_client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes.views import NotesList
+
+User = get_user_model()
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
+
+
+class TestIndexes(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+
+    def setUp(self):
+        self.view = NotesList()
+        self.view.request = RequestFactory().get('/')
+        self.view.request.user = self.author
+
+    def test_notes_list_uses_author_id_index(self):
+        plan = query_plan(self.view.get_queryset()[:50])
+        self.assertIn('note_author_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_list_validators_use_covering_index(self):
+        with CaptureQueriesContext(connection) as context:
+            self.view.get_validators()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {context[0]["sql"]}')
+            plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('USING COVERING INDEX note_author_updated_idx', plan)
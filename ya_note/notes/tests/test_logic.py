@@ -1,12 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
 from pytils.translit import slugify
 
 from notes.forms import WARNING
 from notes.models import Note
+from notes.slugs import allocate_slugs
 
 User = get_user_model()
 
@@ -83,6 +86,52 @@ class TestNoteCreation(TestCase):
         expected_slug = slugify(slug_data['title'])
         self.assertEqual(note.slug, expected_slug)
 
+    def test_empty_slug_with_taken_title_slug(self):
+        taken_slug = slugify(NOTE_TITLE)
+        Note.objects.create(
+            title='Другой', text=NOTE_TEXT, slug=taken_slug, author=self.user,
+        )
+        response = self.auth_client.post(
+            ADD_URL, data={'title': NOTE_TITLE, 'text': NOTE_TEXT}
+        )
+        self.assertRedirects(response, SUCCES_URL)
+        note = Note.objects.get(title=NOTE_TITLE)
+        self.assertTrue(note.slug.startswith(f'{taken_slug}-'))
+
+    def test_allocate_slugs_in_bulk(self):
+        Note.objects.create(
+            title=NOTE_TITLE, text=NOTE_TEXT, author=self.user,
+        )
+        notes = allocate_slugs(
+            Note(title=NOTE_TITLE, text=NOTE_TEXT, author=self.user)
+            for _ in range(5)
+        )
+        Note.objects.bulk_create(notes)
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(set(slugs)), 6)
+        self.assertIn(slugify(NOTE_TITLE), slugs)
+
+
+class TestConcurrentSlugs(TransactionTestCase):
+    THREADS = 8
+
+    def setUp(self):
+        self.user = User.objects.create(username='Мимо Крокодил')
+
+    def create_note(self, _):
+        try:
+            return Note.objects.create(
+                title=NOTE_TITLE, text=NOTE_TEXT, author=self.user,
+            ).slug
+        finally:
+            connection.close()
+
+    def test_identical_titles_in_parallel(self):
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            slugs = list(executor.map(self.create_note, range(self.THREADS)))
+        self.assertEqual(len(set(slugs)), self.THREADS)
+        self.assertEqual(Note.objects.count(), self.THREADS)
+
 
 class TestNoteEditDelete(TestCase):
     NEW_NOTE_TEXT = 'Обновлённая заметка'
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.template.backends.django import Template
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.profiling import ProfilingMiddleware, install_profiler
+
+User = get_user_model()
+
+LIST_URL = reverse('notes:list')
+SLOW_RENDER = 0.05
+
+
+class TestProfiling(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        Note.objects.create(title='Заголовок', text='Текст', author=cls.author)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_profiled_request(self):
+        with self.assertLogs('notes.profiling', 'INFO') as logs:
+            response = self.author_client.get(LIST_URL)
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['url_name'], 'notes:list')
+        self.assertEqual(record['sql_count'], 4)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_template_time_is_measured(self):
+        render = Template.render
+
+        def slow_render(self, *args, **kwargs):
+            time.sleep(SLOW_RENDER)
+            return render(self, *args, **kwargs)
+        with mock.patch.object(Template, 'render', slow_render):
+            with self.assertLogs('notes.profiling', 'INFO') as logs:
+                self.author_client.get(reverse('notes:home'))
+        record = json.loads(logs.records[-1].getMessage())
+        # View рендерит шаблон сам, ещё до middleware.
+        self.assertGreaterEqual(record['template_ms'], SLOW_RENDER * 1000)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_middleware_chain_stays_async(self):
+        # Иначе Django выполняет всю цепочку под ASGI в одном потоке.
+        self.assertTrue(
+            asyncio.iscoroutinefunction(ASGIHandler()._middleware_chain)
+        )
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_profiled_async_request(self):
+        # Соединение теста открыто ещё до включения профилирования.
+        install_profiler(connection)
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+        async def view(request):
+            await sync_to_async(query)()
+            return HttpResponse()
+        middleware = ProfilingMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        with self.assertLogs('notes.profiling', 'INFO') as logs:
+            response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn('1 queries', response['Server-Timing'])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['sql_count'], 1)
+
+    def test_profiling_disabled_by_default(self):
+        response = self.author_client.get(LIST_URL)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_profile_report(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = Path(tmp_dir) / 'profile.log'
+            log.write_text('\n'.join(
+                json.dumps({'url_name': 'notes:list', 'total_ms': total})
+                for total in range(1, 101)
+            ), encoding='utf-8')
+            out = StringIO()
+            call_command('profile_report', str(log), stdout=out)
+        self.assertIn('notes:list\t100\t50.00\t95.00\t99.00', out.getvalue())
@@ -0,0 +1,86 @@
+import asyncio
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TransactionTestCase,
+    override_settings
+)
+from django.urls import reverse
+
+from notes.models import Note
+from notes.replicas import PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter
+
+User = get_user_model()
+
+REPLICA = 'replica'
+LIST_URL = reverse('notes:list')
+ADD_URL = reverse('notes:add')
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class TestReplicaReads(TransactionTestCase):
+    """Основная база и отстающая от неё реплика в двух файлах SQLite."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'replica.sqlite3'
+        connections.databases[REPLICA] = {
+            **connections.databases['default'],
+            'NAME': str(self.path),
+            'TEST': {},
+        }
+        self.addCleanup(self.remove_replica)
+        self.user = User.objects.create(username='Лев Толстой')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.sync_replica()
+
+    def remove_replica(self):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+
+    def sync_replica(self):
+        connection.ensure_connection()
+        target = sqlite3.connect(self.path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+        connections[REPLICA].close()
+
+    def test_list_reads_from_replica(self):
+        Note.objects.create(title='Свежая', text='Текст', author=self.user)
+        self.assertNotContains(self.client.get(LIST_URL), 'Свежая')
+        self.sync_replica()
+        # Без сброса кеша вручную: фрагмент с отставшей реплики хранится
+        # под её ETag.
+        self.assertContains(self.client.get(LIST_URL), 'Свежая')
+
+    def test_author_reads_own_writes(self):
+        response = self.client.post(
+            ADD_URL, {'title': 'Свежая', 'text': 'Текст', 'slug': 'fresh'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(Note.objects.using(REPLICA).exists())
+        self.assertContains(self.client.get(LIST_URL), 'Свежая')
+
+
+class TestReplicaPinMiddleware(SimpleTestCase):
+
+    def test_pin_under_asgi(self):
+        async def view(request):
+            # Синхронная часть view под ASGI выполняется в потоке.
+            await sync_to_async(ReplicaRouter().db_for_write)(Note)
+            return HttpResponse()
+        middleware = ReplicaPinMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().post('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
@@ -11,6 +11,7 @@ User = get_user_model()
 SLUG = 'slug'
 HOME_URL = reverse('notes:home')
 LIST_URL = reverse('notes:list')
+SEARCH_URL = reverse('notes:search')
 SUCCES_URL = reverse('notes:success')
 ADD_URL = reverse('notes:add')
 LOGIN_URL = reverse('users:login')
@@ -42,6 +43,7 @@ class TestPagesAvailability(TestCase):
             (EDIT_URL, cls.reader_client, HTTPStatus.NOT_FOUND),
             (DELETE_URL, cls.reader_client, HTTPStatus.NOT_FOUND),
             (LIST_URL, cls.reader_client, HTTPStatus.OK),
+            (SEARCH_URL, cls.reader_client, HTTPStatus.OK),
             (SUCCES_URL, cls.reader_client, HTTPStatus.OK),
             (ADD_URL, cls.reader_client, HTTPStatus.OK),
             (LOGIN_URL, cls.reader_client, HTTPStatus.OK),
@@ -71,6 +73,7 @@ class TestRedirects(TestCase):
         )
         cls.urls = (
             LIST_URL,
+            SEARCH_URL,
             SUCCES_URL,
             ADD_URL,
             DETAIL_URL,
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from notes.search import _fallback_search, search_notes
+
+User = get_user_model()
+
+SEARCH_URL = reverse('notes:search')
+
+
+class TestSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.reader = User.objects.create(username='Чтец')
+        Note.objects.bulk_create((
+            Note(
+                title='Покупки', text='Купить молоко и хлеб.',
+                slug='shopping', author=cls.author,
+            ),
+            Note(
+                title='Молоко', text='Проверить срок годности.',
+                slug='milk', author=cls.author,
+            ),
+            Note(
+                title='Чужая', text='Молоко для кота.',
+                slug='foreign', author=cls.reader,
+            ),
+        ))
+
+    def titles(self, results):
+        return [note.title for note in results]
+
+    def test_ranked_results_of_author_only(self):
+        results, has_next = search_notes(self.author.id, 'молоко')
+        self.assertEqual(self.titles(results), ['Молоко', 'Покупки'])
+        self.assertFalse(has_next)
+        self.assertIn('<mark>молоко</mark>', results[1].snippet)
+
+    def test_prefix_and_owner_words_are_not_mixed(self):
+        self.assertEqual(
+            self.titles(search_notes(self.author.id, 'хле').results),
+            ['Покупки'],
+        )
+        owner = f'u{self.author.id}'
+        self.assertEqual(search_notes(self.author.id, owner).results, [])
+
+    def test_index_follows_changes(self):
+        note = Note.objects.get(slug='shopping')
+        note.text = 'Купить кефир.'
+        note.save()
+        Note.objects.filter(slug='milk').delete()
+        self.assertEqual(search_notes(self.author.id, 'молоко').results, [])
+        self.assertEqual(
+            self.titles(search_notes(self.author.id, 'кефир').results),
+            ['Покупки'],
+        )
+
+    @override_settings(NOTES_SEARCH_PAGE_SIZE=1)
+    def test_search_pages(self):
+        response = self.author_client.get(SEARCH_URL, {'q': 'молоко'})
+        self.assertEqual(self.titles(response.context['results']), ['Молоко'])
+        self.assertEqual(response.context['next_page'], 2)
+        response = self.author_client.get(
+            SEARCH_URL, {'q': 'молоко', 'page': 2}
+        )
+        self.assertEqual(self.titles(response.context['results']), ['Покупки'])
+        self.assertIsNone(response.context['next_page'])
+        response = self.author_client.get(SEARCH_URL, {'page': 0})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_fallback_search(self):
+        results = _fallback_search(
+            Note.objects, self.author.id, ['хлеб'], 10, 0
+        )
+        self.assertEqual(self.titles(results), ['Покупки'])
+
+    def test_search_benchmark(self):
+        out = StringIO()
+        call_command(
+            'search_benchmark', notes=200, users=5, queries=5, stdout=out
+        )
+        self.assertIn('Заметок: 200', out.getvalue())
+
+
+class TestSearchSchema(TestCase):
+
+    def test_fts_objects_survive_migrations(self):
+        # Тестовая база собрана всеми миграциями: если поздняя миграция
+        # пересоздаст notes_note, триггеры и представление пропадут.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT type, name FROM sqlite_master"
+                " WHERE type IN ('trigger', 'view')"
+                " OR name = 'notes_note_fts'"
+            )
+            objects = set(cursor.fetchall())
+        self.assertEqual(objects, {
+            ('table', 'notes_note_fts'),
+            ('view', 'notes_note_fts_source'),
+            ('trigger', 'notes_note_fts_insert'),
+            ('trigger', 'notes_note_fts_delete'),
+            ('trigger', 'notes_note_fts_update'),
+        })
@@ -0,0 +1,26 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+
+@override_settings(SQLITE_PRAGMAS=settings.SQLITE_PERFORMANCE_PRAGMAS)
+class TestSqlitePragmas(SimpleTestCase):
+
+    def test_pragmas_applied_on_new_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = DatabaseWrapper({
+                **connection.settings_dict,
+                'NAME': str(Path(directory) / 'db.sqlite3'),
+            })
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+            finally:
+                wrapper.close()
@@ -0,0 +1,124 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from notes import throttle
+from notes.models import Note
+from notes.throttle import CacheBuckets, LocalBuckets, get_stats
+
+User = get_user_model()
+
+ADD_URL = reverse('notes:add')
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestBuckets(SimpleTestCase):
+
+    def test_burst_then_refill(self):
+        for backend in (LocalBuckets, CacheBuckets):
+            with self.subTest(backend=backend.__name__):
+                clock = FakeClock()
+                buckets = backend(clock)
+                waits = [buckets.take('key', 5, 60) for _ in range(6)]
+                self.assertEqual(waits[:5], [0] * 5)
+                self.assertAlmostEqual(waits[5], 12)
+                clock.advance(12)
+                self.assertEqual(buckets.take('key', 5, 60), 0)
+                self.assertGreater(buckets.take('key', 5, 60), 0)
+
+    @mock.patch.object(throttle, 'MAX_LOCAL_BUCKETS', 2)
+    def test_full_buckets_are_pruned(self):
+        clock = FakeClock()
+        buckets = LocalBuckets(clock)
+        buckets.take('first', 5, 60)
+        clock.advance(60)
+        buckets.take('second', 5, 60)
+        buckets.take('third', 5, 60)
+        self.assertEqual(set(buckets.buckets), {'second', 'third'})
+
+
+class TestNoteCreateThrottle(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='Лев Толстой')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.clock = FakeClock()
+        patcher = mock.patch.object(
+            throttle, 'get_buckets', return_value=LocalBuckets(self.clock)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_note(self, index):
+        return self.client.post(ADD_URL, {
+            'title': f'Спам {index}', 'text': 'Текст', 'slug': f'spam-{index}',
+        })
+
+    @override_settings(NOTES_THROTTLE_RATES={'note': {'user': (3, 60)}})
+    def test_burst_is_throttled_per_user(self):
+        statuses = [self.create_note(index).status_code for index in range(4)]
+        self.assertEqual(statuses, [HTTPStatus.FOUND] * 3 + [
+            HTTPStatus.TOO_MANY_REQUESTS
+        ])
+        self.assertEqual(Note.objects.count(), 3)
+        self.assertEqual(get_stats('note'), {'ip': 0, 'user': 1})
+        self.clock.advance(20)
+        self.assertEqual(self.create_note(4).status_code, HTTPStatus.FOUND)
+
+    @override_settings(NOTES_THROTTLE_RATES={'note': {'ip': (1, 60)}})
+    def test_rejection_by_ip_makes_no_queries(self):
+        self.create_note(0)
+        with self.assertNumQueries(0):
+            response = self.create_note(1)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+    @override_settings(NOTES_THROTTLE_RATES={'note': {'ip': (1, 60)}})
+    def test_form_page_is_not_throttled(self):
+        for _ in range(3):
+            response = self.client.get(ADD_URL)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(
+        NOTES_THROTTLE_RATES={'note': {'ip': (1, 60)}},
+        NOTES_THROTTLE_IP_HEADER='HTTP_X_FORWARDED_FOR',
+    )
+    def test_ip_taken_from_configured_header(self):
+        statuses = [
+            self.client.post(ADD_URL, {
+                'title': 'Спам', 'text': 'Текст', 'slug': f'spam-{index}',
+            }, HTTP_X_FORWARDED_FOR=forwarded).status_code
+            for index, forwarded in enumerate(
+                ('10.0.0.1', '10.0.0.2', '1.2.3.4, 10.0.0.1')
+            )
+        ]
+        # Все запросы пришли с одного REMOTE_ADDR — адреса прокси.
+        self.assertEqual(statuses, [
+            HTTPStatus.FOUND, HTTPStatus.FOUND, HTTPStatus.TOO_MANY_REQUESTS
+        ])
+
+    @override_settings(NOTES_THROTTLE_RATES={'note': {'ip': (1, 60)}})
+    def test_forwarded_header_ignored_by_default(self):
+        self.create_note(0)
+        response = self.client.post(ADD_URL, {
+            'title': 'Спам', 'text': 'Текст', 'slug': 'spam-1',
+        }, HTTP_X_FORWARDED_FOR='10.0.0.2')
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
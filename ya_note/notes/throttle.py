@@ -0,0 +1,177 @@
+"""
+Ограничение частоты записей: токен-бакеты на пользователя и на IP.
+
+View с throttle_scope проверяет бакеты до формы и запросов к базе и
+при пустом бакете сразу отвечает 429 с заголовком Retry-After. Бакет
+ёмкостью capacity пополняется на capacity токенов за period секунд, их
+задаёт NOTES_THROTTLE_RATES. Бакеты хранятся в памяти процесса
+(LocalBuckets) или в общем кеше (CacheBuckets), если процессов много.
+"""
+import threading
+import time
+from http import HTTPStatus
+from math import ceil
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from .cache import get_cache, incr
+
+MAX_LOCAL_BUCKETS = 10000
+REJECTED_KEY = 'notes:throttle:rejected:{scope}:{kind}'
+KINDS = ('ip', 'user')
+TOO_MANY_REQUESTS = 'Слишком много запросов, повторите позже.'
+
+_buckets = None
+_buckets_key = None
+
+
+def take_token(tokens, elapsed, capacity, period):
+    """
+    Пополняет бакет за elapsed секунд и берёт из него токен.
+
+    Возвращает остаток и сколько секунд ждать следующего токена:
+    0, если токен взят.
+    """
+    rate = capacity / period
+    tokens = min(capacity, tokens + elapsed * rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+class LocalBuckets:
+    """Бакеты в памяти процесса: у каждого процесса свой лимит."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.lock = threading.Lock()
+        # Ключ -> (токены, время обновления, когда бакет снова полон).
+        self.buckets = {}
+
+    def take(self, key, capacity, period):
+        with self.lock:
+            now = self.clock()
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens, wait = take_token(tokens, now - updated, capacity, period)
+            full_at = now + (capacity - tokens) * period / capacity
+            self.buckets[key] = (tokens, now, full_at)
+            if len(self.buckets) > MAX_LOCAL_BUCKETS:
+                self.prune(now)
+            return wait
+
+    def prune(self, now):
+        """Полный бакет ничем не отличается от отсутствующего."""
+        self.buckets = {
+            key: bucket for key, bucket in self.buckets.items()
+            if bucket[2] > now
+        }
+
+
+class CacheBuckets:
+    """
+    Бакеты в кеше NOTES_CACHE_ALIAS, общие для всех процессов.
+
+    Чтение и запись бакета не атомарны: при одновременных запросах с
+    одного ключа лишний запрос может пройти, что для защиты от спама
+    допустимо. Бакет живёт в кеше, пока не наполнится снова.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+
+    def take(self, key, capacity, period):
+        cache = get_cache()
+        cache_key = f'notes:throttle:{key}'
+        now = self.clock()
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens, wait = take_token(tokens, now - updated, capacity, period)
+        cache.set(cache_key, (tokens, now), ceil(period))
+        return wait
+
+
+def get_buckets():
+    """Хранилище бакетов из NOTES_THROTTLE_BACKEND, одно на процесс."""
+    global _buckets, _buckets_key
+    if settings.NOTES_THROTTLE_BACKEND != _buckets_key:
+        _buckets = import_string(settings.NOTES_THROTTLE_BACKEND)()
+        _buckets_key = settings.NOTES_THROTTLE_BACKEND
+    return _buckets
+
+
+def reset_buckets():
+    global _buckets, _buckets_key
+    _buckets = _buckets_key = None
+
+
+def get_stats(scope):
+    """Сколько запросов отклонено по IP и по пользователю."""
+    cache = get_cache()
+    return {
+        kind: cache.get(REJECTED_KEY.format(scope=scope, kind=kind), 0)
+        for kind in KINDS
+    }
+
+
+def client_ip(request):
+    """
+    Адрес клиента из заголовка NOTES_THROTTLE_IP_HEADER или REMOTE_ADDR.
+
+    За обратным прокси REMOTE_ADDR — адрес самого прокси. Из списка
+    адресов в заголовке берётся последний: его дописал ближайший прокси,
+    а начало списка присылает сам клиент.
+    """
+    header = settings.NOTES_THROTTLE_IP_HEADER
+    forwarded = request.META.get(header, '') if header else ''
+    return forwarded.split(',')[-1].strip() or request.META.get('REMOTE_ADDR')
+
+
+def _identity(request, kind):
+    if kind == 'ip':
+        return client_ip(request)
+    # Анонимов и так не пустит LoginRequiredMixin.
+    return request.user.pk if request.user.is_authenticated else None
+
+
+def throttle(request, scope):
+    """
+    Сколько секунд ждать до следующей записи; 0 — можно писать.
+
+    Сначала проверяется IP: отказ по нему не требует даже загрузки
+    пользователя из сессии.
+    """
+    rates = settings.NOTES_THROTTLE_RATES.get(scope, {})
+    for kind in KINDS:
+        if kind not in rates:
+            continue
+        identity = _identity(request, kind)
+        if identity is None:
+            continue
+        wait = get_buckets().take(f'{scope}:{kind}:{identity}', *rates[kind])
+        if wait:
+            incr(REJECTED_KEY.format(scope=scope, kind=kind))
+            return wait
+    return 0
+
+
+class ThrottleMixin:
+    """
+    Ограничивает частоту запросов throttle_methods к view.
+
+    Должен стоять первым среди базовых классов, чтобы отказ не стоил
+    ни запросов к базе, ни проверки формы.
+    """
+    throttle_scope = None
+    throttle_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.throttle_scope and request.method in self.throttle_methods:
+            wait = throttle(request, self.throttle_scope)
+            if wait:
+                response = HttpResponse(
+                    TOO_MANY_REQUESTS, status=HTTPStatus.TOO_MANY_REQUESTS
+                )
+                response['Retry-After'] = ceil(wait)
+                return response
+        return super().dispatch(request, *args, **kwargs)
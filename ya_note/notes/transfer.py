@@ -0,0 +1,34 @@
+"""Построчное чтение и запись заметок в JSON Lines и CSV."""
+import csv
+import json
+from pathlib import Path
+
+FIELDS = ('title', 'text', 'slug', 'author')
+FORMATS = ('jsonl', 'csv')
+
+
+def guess_format(path):
+    suffix = Path(path).suffix.lstrip('.')
+    return suffix if suffix in FORMATS else 'jsonl'
+
+
+def read_rows(stream, file_format):
+    """Генератор словарей по одному на заметку."""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_rows(stream, file_format, rows):
+    """Записывает кортежи в порядке FIELDS, не накапливая их в памяти."""
+    if file_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+        return
+    for row in rows:
+        stream.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+        stream.write('\n')
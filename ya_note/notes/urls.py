@@ -1,6 +1,6 @@
 from django.urls import path
 
-from notes import views
+from notes import api, views
 
 app_name = 'notes'
 
@@ -11,5 +11,11 @@ urlpatterns = [
     path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
     path('notes/', views.NotesList.as_view(), name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('api/notes/', api.NotesApi.as_view(), name='api_list'),
+    path(
+        'api/notes/<slug:slug>/', api.NoteApi.as_view(), name='api_detail'
+    ),
+    path('api/sync/', api.SyncApi.as_view(), name='api_sync'),
 ]
@@ -1,22 +1,38 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .budget import QueryBudgetMixin
+from .cache import get_fragment
+from .conditional import ConditionalGetMixin
+from .forms import WARNING, NoteForm
 from .models import Note
+from .replicas import ReplicaReadMixin
+from .search import search_notes
+from .throttle import ThrottleMixin
 
+INVALID_AFTER = 'Параметр after должен быть числом.'
+INVALID_PAGE = 'Номер страницы должен быть положительным числом.'
 
-class Home(generic.TemplateView):
+
+class Home(QueryBudgetMixin, generic.TemplateView):
     """Домашняя страница."""
     template_name = 'notes/home.html'
+    query_budget = 2
 
 
-class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
+class NoteSuccess(QueryBudgetMixin, LoginRequiredMixin, generic.TemplateView):
     """Страница успешного выполнения операции."""
     template_name = 'notes/success.html'
+    query_budget = 2
 
 
-class NoteBase(LoginRequiredMixin):
+class NoteBase(QueryBudgetMixin, LoginRequiredMixin):
     """Базовый класс для остальных CBV."""
     model = Note
     success_url = reverse_lazy('notes:success')
@@ -26,34 +42,199 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class CachedFragmentMixin:
+    """
+    Основная часть страницы рендерится один раз и берётся из кеша автора.
+
+    Queryset ленивый, поэтому при попадании в кеш он не выполняется.
+    В имя фрагмента входит ETag страницы, если он есть: ETag и данные
+    читаются с одной реплики, так что фрагмент с отстающей реплики не
+    выдаётся за свежий, когда она догонит основную базу.
+    """
+    fragment_template_name = None
+
+    def get_fragment_name(self, context):
+        """По умолчанию фрагмент различается адресом и параметрами."""
+        return self.request.get_full_path()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        name = self.get_fragment_name(context)
+        etag = getattr(self, 'etag', None)
+        if etag is not None:
+            name = f'{name}:{etag}'
+        context['fragment'] = get_fragment(
+            self.request.user.id,
+            name,
+            lambda: render_to_string(
+                self.fragment_template_name, context, self.request
+            ),
+        )
+        return context
+
+
+class NoteFormMixin:
+    """
+    Сохранение заметки из формы.
+
+    Если slug заняли между проверкой в форме и записью, ошибка
+    ограничения уникальности показывается в форме, а не как 500.
+    """
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.cleaned_data['slug'] + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(
+        ThrottleMixin, NoteBase, NoteFormMixin, generic.CreateView
+):
+    """Добавление заметки."""
+    # Повтор с суффиксом при занятом slug стоит ещё двух запросов,
+    # номер изменения для синхронизации — тоже двух.
+    query_budget = 8
+    throttle_scope = 'note'
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+    # Смена slug оставляет надгробие: ещё три запроса.
+    query_budget = 11
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
-
-
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    # Надгробие для синхронизации стоит трёх запросов.
+    query_budget = 7
+
+
+class NotesList(
+        NoteBase,
+        ReplicaReadMixin,
+        ConditionalGetMixin,
+        CachedFragmentMixin,
+        generic.ListView
+):
+    """
+    Список всех заметок пользователя.
+
+    Обычная постраничная навигация через ?page=N или keyset через
+    ?after=<id>: второй вариант обходится без COUNT и OFFSET.
+    """
     template_name = 'notes/list.html'
+    fragment_template_name = 'notes/includes/list.html'
+    query_budget = 4
+    after = None
+    next_after = None
+    notes_count = None
+
+    def get_validators(self):
+        """Число заметок и время последней правки по индексу автора."""
+        stats = super().get_queryset().aggregate(
+            count=Count('id'), last=Max('updated')
+        )
+        # Пагинатору повторно считать заметки уже не нужно.
+        self.notes_count = stats['count']
+        last = stats['last']
+        etag = f'{self.request.user.pk}-{stats["count"]}'
+        if last is not None:
+            etag += f'-{last.timestamp()}'
+        # Без Last-Modified: удаление заметки не увеличивает max(updated),
+        # а число заметок в ETag при этом меняется.
+        return etag, None
 
-
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_queryset(self):
+        """Шаблону нужны только id, slug и title."""
+        return super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_COUNT_ON_PAGE
+
+    def get_paginator(self, *args, **kwargs):
+        paginator = super().get_paginator(*args, **kwargs)
+        if self.notes_count is not None:
+            paginator.count = self.notes_count
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get('after')
+        if after is None:
+            return super().paginate_queryset(queryset, page_size)
+        try:
+            after = int(after)
+        except ValueError:
+            raise BadRequest(INVALID_AFTER)
+        self.after = after
+        notes = list(queryset.filter(pk__gt=after)[:page_size + 1])
+        self.next_after = (
+            notes[page_size - 1].pk if len(notes) > page_size else None
+        )
+        return None, None, notes[:page_size], False
+
+    def get_fragment_name(self, context):
+        if context['page_obj'] is None:
+            return f'list:after:{self.after}'
+        return f'list:page:{context["page_obj"].number}'
+
+
+class NoteDetail(
+        NoteBase,
+        ReplicaReadMixin,
+        ConditionalGetMixin,
+        CachedFragmentMixin,
+        generic.DetailView
+):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    fragment_template_name = 'notes/includes/detail.html'
+    query_budget = 4
+
+    def get_validators(self):
+        row = self.get_queryset().filter(
+            slug=self.kwargs['slug']
+        ).values_list('pk', 'updated').first()
+        if row is None:
+            return None, None
+        pk, updated = row
+        return f'{pk}-{updated.timestamp()}', updated
+
+    def get_fragment_name(self, context):
+        return f'detail:{self.object.pk}'
+
+
+class NoteSearch(NoteBase, ReplicaReadMixin, generic.TemplateView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    query_budget = 3
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        page = self.request.GET.get('page', '1')
+        if not page.isdigit() or int(page) < 1:
+            raise BadRequest(INVALID_PAGE)
+        page = int(page)
+        results, has_next = search_notes(
+            self.request.user.id, query, page, settings.NOTES_SEARCH_PAGE_SIZE
+        )
+        context.update(
+            query=query,
+            results=results,
+            page=page,
+            previous_page=page - 1,
+            next_page=page + 1 if has_next else None,
+        )
+        return context
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.profiling.ProfilingMiddleware',
+    'notes.replicas.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,13 +55,81 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
+# Профиль SQLite для нагруженной работы: WAL, прагмы при открытии
+# соединения и постоянные соединения. Включается SQLITE_PERFORMANCE=1.
+SQLITE_PERFORMANCE = os.environ.get('SQLITE_PERFORMANCE') == '1'
+SQLITE_PERFORMANCE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение задаётся в килобайтах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+}
+SQLITE_PRAGMAS = SQLITE_PERFORMANCE_PRAGMAS if SQLITE_PERFORMANCE else {}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'notes.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600 if SQLITE_PERFORMANCE else 0,
+        # Файловая тестовая база: в памяти SQLite не даёт писать
+        # из нескольких потоков, а тесты на гонки это делают.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Реплики для чтения: пути к копиям базы через os.pathsep в
+# SQLITE_REPLICAS. Копии поддерживаются снаружи, например litestream.
+# После записи пользователь REPLICA_PIN_SECONDS читает с основной базы
+# и видит свои изменения. Фрагменты страниц кешируются вместе с ETag,
+# прочитанным с той же реплики, так что отставшая копия не заменяет
+# свежую и после окончания этого окна.
+DATABASE_REPLICAS = []
+for index, path in enumerate(
+    filter(None, os.environ.get('SQLITE_REPLICAS', '').split(os.pathsep)),
+    start=1,
+):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+DATABASE_ROUTERS = ['notes.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+NOTES_CACHE_ALIAS = 'default'
+NOTES_CACHE_TIMEOUT = 300
+
+NOTES_COUNT_ON_PAGE = 50
+
+NOTES_SEARCH_PAGE_SIZE = 20
+
+# Заметок на странице JSON API и изменений в одном ответе синхронизации.
+NOTES_API_PAGE_SIZE = 100
+NOTES_SYNC_PAGE_SIZE = 500
+
+# Токен-бакеты для записей: (ёмкость, секунд на полное пополнение)
+# на пользователя и на IP. Для нескольких процессов нужен общий кеш
+# и notes.throttle.CacheBuckets.
+NOTES_THROTTLE_BACKEND = 'notes.throttle.LocalBuckets'
+NOTES_THROTTLE_RATES = {
+    'note': {'user': (10, 60), 'ip': (30, 60)},
+}
+# Ключ request.META с адресом клиента, если перед приложением стоит
+# обратный прокси: иначе все клиенты делят бакет с адресом прокси.
+# Например 'HTTP_X_FORWARDED_FOR' (берётся последний адрес) или
+# 'HTTP_X_REAL_IP'. None — REMOTE_ADDR. Без прокси заголовок задавать
+# нельзя: его подделает сам клиент.
+NOTES_THROTTLE_IP_HEADER = None
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +158,23 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Превышение query_budget у view: исключение вместо записи в лог.
+QUERY_BUDGET_STRICT = DEBUG
+
+# Доля профилируемых запросов от 0 до 1; при 0 middleware отключено.
+PROFILING_SAMPLE_RATE = 0
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'notes.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}